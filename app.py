@@ -4,10 +4,15 @@ Fake News Detection System – Streamlit Application (Colourful Clean UI)
     
 import streamlit as st
 from src.extractor import extract_article_text
-from src.predictor import FakeNewsPredictor
+from src.extraction_profiles import ExtractionProfiles
+from src.model_registry import ModelRegistry
 from src.fact_check import search_fact_check
 from src.related_news import search_related_news
-from src.utils import validate_url
+from src.pipeline import analyze_url
+from src.admission import (
+    AdmissionController, Overloaded, DeadlineExceeded, deadline_after, URL_DEADLINE, TEXT_DEADLINE,
+)
+from src.utils import validate_url, canonicalize_url
 
 # -------------------- PAGE CONFIG --------------------
 st.set_page_config(
@@ -19,15 +24,84 @@ st.set_page_config(
 
 @st.cache_resource
 def load_predictor():
-    """Load predictor with caching"""
+    """Load predictor with caching; new model versions are hot-reloaded"""
     try:
-        detector = FakeNewsPredictor()
+        detector = ModelRegistry()
         st.success("✓ Model and vectorizer loaded successfully")
         return detector
     except Exception as e:
         st.error(f"Error loading model: {str(e)}")
         return None
 
+@st.cache_resource
+def load_admission():
+    """Admission controller shared by all sessions of the process"""
+    return AdmissionController()
+
+@st.cache_resource
+def load_extraction_profiles():
+    """Per-domain extraction selectors learned from earlier articles"""
+    return ExtractionProfiles()
+
+# -------------------- CACHED STAGES --------------------
+# Streamlit re-executes the script on every widget interaction, so the
+# expensive stages are memoised across reruns and sessions.
+EXTRACT_CACHE_TTL = 60 * 60          # 1 hour
+PREDICT_CACHE_TTL = 24 * 60 * 60     # 1 day
+RELATED_CACHE_TTL = 60 * 60          # 1 hour
+CACHE_MAX_ENTRIES = 512
+
+
+class ExtractionFailed(Exception):
+    """Raised inside the cached extractor so failed extractions are not cached"""
+
+    def __init__(self, article_data):
+        super().__init__(article_data.get("error"))
+        self.article_data = article_data
+
+
+def normalise_text(text):
+    """Collapse whitespace so trivially different inputs share a cache entry"""
+    return " ".join(text.split())
+
+
+@st.cache_data(ttl=EXTRACT_CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_extract(canonical_url, _url):
+    article_data = extract_article_text(_url, domain_profiles=load_extraction_profiles())
+    if not article_data.get("success") or not article_data.get("full_text"):
+        raise ExtractionFailed(article_data)
+    return article_data
+
+
+def get_article(url):
+    """Extract an article, reusing earlier successful extractions of the same URL"""
+    url = url.strip()
+    try:
+        return _cached_extract(canonicalize_url(url) or url, url)
+    except ExtractionFailed as e:
+        return e.article_data
+
+
+@st.cache_data(ttl=PREDICT_CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_predict(_predictor, text, model_version):
+    return _predictor.predict(text)
+
+
+def get_prediction(predictor, text):
+    """Run the model, keyed on the whitespace-normalised text and model version"""
+    return _cached_predict(predictor, normalise_text(text), predictor.version)
+
+
+@st.cache_data(ttl=RELATED_CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_related_news(query):
+    return search_related_news(query)
+
+
+def get_related_news(query):
+    """Related news lookup, memoised per whitespace-normalised query"""
+    return _cached_related_news(normalise_text(query))
+
+
 # -------------------- CSS STYLING --------------------
 st.markdown(
     """
@@ -309,38 +383,15 @@ def show_links(links, heading: str, icon: str):
         )
 
 
-# -------------------- MAIN APP --------------------
-def main():
-    st.markdown('<div class="page-wrapper">', unsafe_allow_html=True)
-
-    # Hero
-    st.markdown(
-        """
-        <div class="hero">
-            <div class="hero-pill">
-                <span>✨</span> AI-assisted news detection
-            </div>
-            <h1 class="hero-title">Fake News Detector</h1>
-            <p class="hero-subtitle">
-                Paste a news article URL or text and let the model estimate whether the content is more
-                likely to be <strong>real</strong> or <strong>fake</strong>. You also get links
-                to help you cross-check the story.
-            </p>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    # Main white card
-    st.markdown('<div class="content-card">', unsafe_allow_html=True)
-
-    # Load predictor
-    predictor = load_predictor()
-    
-    if predictor is None:
-        st.error("Unable to load the model. Please check if the model files exist.")
-        return
+# -------------------- ANALYSIS PANEL --------------------
+@st.fragment
+def analysis_panel(predictor):
+    """
+    Input widgets and analysis results.
 
+    Runs as a fragment so interacting with these widgets only reruns this
+    panel, not the whole page.
+    """
     # Input options
     input_mode = st.radio(
         "Choose input method:",
@@ -396,7 +447,15 @@ def main():
 
         with st.spinner("Analyzing text..."):
             # Get model prediction based on text content
-            result = predictor.predict(article_text)
+            try:
+                result, _ = load_admission().run(
+                    "text",
+                    lambda: get_prediction(predictor, article_text),
+                    deadline_after(TEXT_DEADLINE),
+                )
+            except (Overloaded, DeadlineExceeded):
+                st.warning("The server is busy right now. Please try again in a moment.")
+                return
 
             if result.get("error"):
                 st.error(f"Prediction error: {result['error']}")
@@ -405,7 +464,7 @@ def main():
         # Search for related news for user to verify
         with st.spinner("Searching for related news..."):
             query = article_title
-            related_links = search_related_news(query)
+            related_links = get_related_news(query)
 
         st.markdown("---")
         
@@ -457,25 +516,55 @@ def main():
         else:
             with st.spinner("Extracting article and running the model..."):
 
-                # 1. Extract article
-                article_data = extract_article_text(url)
+                # ?profile=1 dumps a profile of this request (see src/profiling.py)
+                profile = True if st.query_params.get("profile") == "1" else None
+                deadline = deadline_after(URL_DEADLINE)
+
+                # Extraction first, then scoring and the related-news and
+                # fact-check lookups for the title run in parallel
+                try:
+                    analysis, from_cache = load_admission().run(
+                        "url",
+                        lambda: analyze_url(
+                            url,
+                            predict=lambda text: get_prediction(predictor, text),
+                            extract=get_article,
+                            related=get_related_news,
+                            fact_check=search_fact_check,
+                            profile=profile,
+                            deadline=deadline,
+                        ),
+                        deadline,
+                        key=canonicalize_url(url),
+                    )
+                except Overloaded:
+                    st.warning(
+                        "Too many articles are being fetched right now. Switch to **Text** "
+                        "and paste the article for an instant check, or try again shortly."
+                    )
+                    return
+                except DeadlineExceeded:
+                    st.error("The article could not be analyzed in time. Please try again.")
+                    return
+
+                if from_cache:
+                    st.info("The server is busy, so this is a recent result for the same article.")
 
-                if not article_data.get("success") or not article_data.get("full_text"):
+                if analysis["error_stage"] == "extract":
                     st.error(
                         f"Could not extract the article content. "
-                        f"{article_data.get('error', 'Unknown error.')}"
+                        f"{analysis['error']}"
                     )
                     return
 
+                if analysis["error"]:
+                    st.error(f"Prediction error: {analysis['error']}")
+                    return
+
+                article_data = analysis["article"]
                 article_title = article_data.get("title") or "Untitled article"
                 article_text = article_data["full_text"]
-
-                # 2. Predict
-                result = predictor.predict(article_text)
-
-                if result.get("error"):
-                    st.error(f"Prediction error: {result['error']}")
-                    return
+                result = analysis["prediction"]
 
             st.markdown("---")
             show_prediction(result, article_title)
@@ -508,10 +597,47 @@ def main():
                 )
 
             with tab_links:
-                query = article_title
-                with st.spinner("Searching for related coverage from other sources..."):
-                    related_links = search_related_news(query)
-                    show_links(related_links, "Similar news from other sources", "📰")
+                if "related" in analysis["degraded"]:
+                    st.info("Related coverage is unavailable right now.")
+                else:
+                    show_links(analysis["related"], "Similar news from other sources", "📰")
+                if result.get("label") == "Fake" and analysis["fact_checks"]:
+                    show_links(analysis["fact_checks"], "Fact-check resources", "🔍")
+
+
+# -------------------- MAIN APP --------------------
+def main():
+    st.markdown('<div class="page-wrapper">', unsafe_allow_html=True)
+
+    # Hero
+    st.markdown(
+        """
+        <div class="hero">
+            <div class="hero-pill">
+                <span>✨</span> AI-assisted news detection
+            </div>
+            <h1 class="hero-title">Fake News Detector</h1>
+            <p class="hero-subtitle">
+                Paste a news article URL or text and let the model estimate whether the content is more
+                likely to be <strong>real</strong> or <strong>fake</strong>. You also get links
+                to help you cross-check the story.
+            </p>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # Main white card
+    st.markdown('<div class="content-card">', unsafe_allow_html=True)
+
+    # Load predictor
+    predictor = load_predictor()
+    
+    if predictor is None:
+        st.error("Unable to load the model. Please check if the model files exist.")
+        return
+
+    analysis_panel(predictor)
 
     # About section - always visible
     st.markdown(
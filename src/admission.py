@@ -0,0 +1,183 @@
+"""
+Admission control and deadline-aware load shedding for the analyze path
+
+URL and text requests go through separate lanes, each with a fixed number
+of workers and a bounded queue, so slow extractions can only ever hold the
+URL lane. A request that does not fit in its lane's queue is refused at
+once (Overloaded) instead of waiting, and queued work whose deadline has
+passed is dropped before it starts (DeadlineExceeded).
+"""
+import contextvars
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+# Request deadlines in seconds
+URL_DEADLINE = 30.0
+TEXT_DEADLINE = 5.0
+
+# (workers, queue size) per lane
+LANES = {
+    'url': (4, 8),
+    'text': (8, 32),
+}
+
+class Overloaded(Exception):
+    """The lane's queue is full; the request was not started"""
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before its work finished"""
+
+
+def deadline_after(seconds):
+    """Absolute deadline (time.monotonic() based) `seconds` from now"""
+    return time.monotonic() + seconds
+
+def check_deadline(deadline, stage):
+    """Raise DeadlineExceeded if `deadline` (or None for no deadline) has passed"""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded(f'Deadline passed before {stage}.')
+
+
+class Lane:
+    """
+    Fixed pool of workers with a bounded queue in front of it
+    """
+
+    def __init__(self, name, workers, queue_size):
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'lane-{name}')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def submit(self, task, deadline):
+        """
+        Queue a zero-argument callable
+
+        Raises:
+            Overloaded: When workers and queue are all taken
+
+        Returns:
+            concurrent.futures.Future
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise Overloaded(f'The {self.name} lane is full.')
+        self._count('admitted')
+
+        def run():
+            # Shed work that waited in the queue past its deadline
+            try:
+                check_deadline(deadline, f'{self.name} work started')
+            except DeadlineExceeded:
+                self._count('shed')
+                raise
+            return task()
+
+        try:
+            future = self._executor.submit(contextvars.copy_context().run, run)
+        except Exception:
+            self._slots.release()
+            raise
+        # Fires when the task finishes and also when it is cancelled while
+        # still queued, so every admitted request returns its slot
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def cancel(self, future):
+        """Drop a request that is still queued; running work is left to finish"""
+        if future.cancel():
+            self._count('shed')
+
+
+class AdmissionController:
+    """
+    Front door for extraction and prediction work
+
+    Keeps the last successful results per key so a saturated lane can
+    still answer requests it has seen recently.
+    """
+
+    def __init__(self, lanes=None, cache_size=256):
+        """
+        Args:
+            lanes (dict): Lane name -> (workers, queue size); defaults to LANES
+            cache_size (int): Recent results kept for degraded answers
+        """
+        self.lanes = {name: Lane(name, *size) for name, size in (lanes or LANES).items()}
+        self.cache_size = cache_size
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, key):
+        """Most recent result stored under `key`, or None"""
+        with self._lock:
+            if key in self._recent:
+                self._recent.move_to_end(key)
+                return self._recent[key]
+        return None
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._recent[key] = result
+            self._recent.move_to_end(key)
+            while len(self._recent) > self.cache_size:
+                self._recent.popitem(last=False)
+
+    def run(self, lane, task, deadline, key=None):
+        """
+        Run `task` in `lane` and wait for it until `deadline`
+
+        The task should carry the same deadline into its own stages (see
+        pipeline.analyze_url), so work for an abandoned request stops early.
+
+        Args:
+            lane (str): Lane name, e.g. 'url' or 'text'
+            task (callable): Zero-argument callable doing the work
+            deadline (float): Absolute time.monotonic() deadline
+            key: Cache key; when given, a saturated lane answers with the
+                last result for the same key instead of refusing
+
+        Returns:
+            tuple: (result, degraded) - degraded is True for a cached answer
+
+        Raises:
+            Overloaded: Lane is full and nothing is cached for `key`
+            DeadlineExceeded: The deadline passed before the task finished
+        """
+        try:
+            future = self.lanes[lane].submit(task, deadline)
+        except Overloaded:
+            result = self.cached(key) if key is not None else None
+            if result is None:
+                raise
+            return result, True
+
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            self.lanes[lane].cancel(future)
+            raise DeadlineExceeded(f'The {lane} request did not finish in time.')
+
+        # Failed analyses are not worth serving again
+        if key is not None and not (hasattr(result, 'get') and result.get('error')):
+            self._remember(key, result)
+        return result, False
+
+    def stats(self):
+        """
+        Returns:
+            dict: lane name -> counts of admitted, rejected and shed requests
+        """
+        stats = {}
+        for name, lane in self.lanes.items():
+            # Workers add new keys (e.g. 'shed') while the lane is in use
+            with lane._lock:
+                stats[name] = dict(lane.stats)
+        return stats
@@ -0,0 +1,513 @@
+"""
+Micro-benchmarks for the fake news detection pipeline
+
+Run from the project root, e.g.:
+    python -m src.benchmarks long-docs
+    python -m src.benchmarks urls
+    python -m src.benchmarks analyze
+    python -m src.benchmarks cascade
+    python -m src.benchmarks results
+    python -m src.benchmarks overload
+    python -m src.benchmarks profiles saved_pages/
+"""
+import argparse
+import random
+import time
+from collections import Counter
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """
+    Nearest-rank percentiles of a list of numbers
+
+    Args:
+        samples (list): Measured values
+        points (tuple): Percentiles to report
+
+    Returns:
+        dict: Mapping like {'p50': ..., 'p95': ..., 'p99': ...}
+    """
+    ordered = sorted(samples)
+    result = {}
+    for point in points:
+        rank = max(0, min(len(ordered) - 1, int(round(point / 100 * len(ordered))) - 1))
+        result[f'p{point}'] = ordered[rank]
+    return result
+
+
+def synthetic_documents(vocabulary, count, min_words, max_words, seed=0):
+    """
+    Build random documents from a vocabulary, mimicking scraped pages of
+    very different lengths (live blogs, transcripts, comment threads)
+    """
+    rng = random.Random(seed)
+    words = list(vocabulary)
+    return [
+        ' '.join(rng.choice(words) for _ in range(rng.randint(min_words, max_words)))
+        for _ in range(count)
+    ]
+
+
+def bench_long_documents(args):
+    """Tail latency of full vs long-document scoring on synthetic long texts"""
+    from src.predictor import FakeNewsPredictor
+
+    predictor = FakeNewsPredictor()
+    vocabulary = list(predictor.tfidf.vocabulary_)[:20000]
+    docs = synthetic_documents(vocabulary, args.count, args.min_words, args.max_words)
+
+    for mode in (False, True):
+        timings = []
+        stop_reasons = {}
+        for doc in docs:
+            start = time.perf_counter()
+            result = predictor.predict(doc, long_document=mode, max_tokens=args.max_tokens)
+            timings.append((time.perf_counter() - start) * 1000)
+            info = result.get('long_document')
+            if info:
+                stop_reasons[info['stop_reason']] = stop_reasons.get(info['stop_reason'], 0) + 1
+
+        stats = percentiles(timings)
+        name = 'long-document' if mode else 'full transform'
+        print(f"{name:15s} " + '  '.join(f"{k}={v:7.2f}ms" for k, v in stats.items()))
+        if stop_reasons:
+            print(f"{'':15s} stop reasons: {stop_reasons}")
+
+
+def synthetic_feed_urls(count, duplicate_ratio, seed=0):
+    """
+    Build a feed of article URLs where a share of entries are variants
+    (tracking parameters, fragments, AMP/mobile mirrors) of earlier ones
+    """
+    rng = random.Random(seed)
+    hosts = [f'news{i}.example.com' for i in range(50)]
+    variants = [
+        '{}?utm_source=twitter&utm_medium=social',
+        '{}#comments',
+        '{}?fbclid=IwAR{}',
+        '{}/amp',
+    ]
+    originals = []
+    urls = []
+    for i in range(count):
+        if originals and rng.random() < duplicate_ratio:
+            base = rng.choice(originals)
+            variant = rng.choice(variants)
+            url = variant.format(base, rng.randint(0, 10 ** 6))
+            if rng.random() < 0.3:
+                url = url.replace('https://', 'http://m.', 1)
+        else:
+            url = f'https://{rng.choice(hosts)}/{rng.randint(2000, 2030)}/story-{i}'
+            originals.append(url)
+        urls.append(url)
+    return urls
+
+
+def bench_urls(args):
+    """Throughput (URLs/sec) and false-positive rate of the URL dedup stage"""
+    from src.url_filter import UrlDeduplicator
+    from src.utils import canonicalize_url
+
+    urls = synthetic_feed_urls(args.count, args.duplicate_ratio)
+
+    start = time.perf_counter()
+    for url in urls:
+        canonicalize_url(url)
+    elapsed = time.perf_counter() - start
+    print(f"canonicalize only   {len(urls) / elapsed:12,.0f} URLs/sec")
+
+    dedup = UrlDeduplicator(initial_capacity=args.capacity, error_rate=args.error_rate)
+    start = time.perf_counter()
+    kept = 0
+    for _, canonical in dedup.filter(urls):
+        # Every fetch succeeds in the benchmark
+        dedup.mark_processed(canonical)
+        kept += 1
+    elapsed = time.perf_counter() - start
+    print(f"canonicalize+filter {len(urls) / elapsed:12,.0f} URLs/sec "
+          f"({kept:,} of {len(urls):,} kept, {len(dedup.processed.filters)} filter slices)")
+
+    probes = [f'https://unseen.example.org/probe-{i}' for i in range(args.count)]
+    false_positives = sum(1 for url in probes if canonicalize_url(url) in dedup.processed)
+    print(f"false-positive rate {false_positives / len(probes):.5f} (target {args.error_rate})")
+
+
+STAND_IN_ARTICLE = """<html><head><title>{title}</title></head><body>
+<article><h1>{title}</h1>{paragraphs}</article></body></html>"""
+
+
+def serve_stand_in_site(delay, paragraphs=40):
+    """
+    Serve a synthetic news article on localhost, answering after `delay`
+    seconds to mimic a slow publisher
+
+    Returns:
+        tuple: (server, url)
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    rng = random.Random(0)
+    words = ('government officials said the report would be released next week after '
+             'a review of the budget and the new policy on schools hospitals and roads').split()
+    body = STAND_IN_ARTICLE.format(
+        title='Officials announce review of regional budget',
+        paragraphs=''.join(
+            '<p>' + ' '.join(rng.choice(words) for _ in range(60)) + '.</p>'
+            for _ in range(paragraphs)
+        ),
+    ).encode('utf-8')
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/news/story'
+
+
+def bench_analyze(args):
+    """End-to-end URL analyze latency, sequential vs pipelined, on a local site"""
+    from src.extractor import extract_article_text
+    from src.fact_check import search_fact_check
+    from src.pipeline import analyze_url
+    from src.predictor import FakeNewsPredictor
+    from src.related_news import search_related_news
+
+    predictor = FakeNewsPredictor()
+    server, url = serve_stand_in_site(args.site_delay)
+
+    def slow(lookup):
+        # Stand-in for a live search API
+        def wrapped(query):
+            time.sleep(args.lookup_delay)
+            return lookup(query)
+        return wrapped
+
+    related, fact_check = slow(search_related_news), slow(search_fact_check)
+
+    def sequential():
+        article = extract_article_text(url)
+        predictor.predict(article['full_text'])
+        related(article['title'])
+        fact_check(article['title'])
+
+    def pipelined():
+        analyze_url(url, predictor.predict, related=related, fact_check=fact_check)
+
+    try:
+        for name, run in (('sequential', sequential), ('pipelined', pipelined)):
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            stats = percentiles(timings)
+            print(f"{name:11s} " + '  '.join(f"{k}={v:7.1f}ms" for k, v in stats.items()))
+    finally:
+        server.shutdown()
+
+
+def load_labelled_articles(fake_csv, true_csv, count, seed=0):
+    """
+    Sample labelled articles from the Kaggle Fake/True CSVs used by the
+    training notebook
+
+    Returns:
+        tuple: (texts, labels) with label 0 for fake and 1 for real
+    """
+    import pandas as pd
+
+    df_fake = pd.read_csv(fake_csv)
+    df_true = pd.read_csv(true_csv)
+    df_fake['class'] = 0
+    df_true['class'] = 1
+    df = pd.concat([df_fake, df_true], axis=0).sample(n=count, random_state=seed)
+    return (df['title'].fillna('') + '. ' + df['text'].fillna('')).tolist(), df['class'].tolist()
+
+
+def bench_cascade(args):
+    """Escalation rate, accuracy and throughput of the cascade vs LR-only and heavy-only"""
+    from src.predictor import FakeNewsPredictor
+    from src.utils import clean_text
+
+    predictor = FakeNewsPredictor(second_stage_name=args.second_stage)
+    second_stage = predictor.load_second_stage()
+    if second_stage is None:
+        print(f"No usable second-stage model in {predictor.second_stage_path}; "
+              f"run the training notebook to create it.")
+        return
+
+    texts, labels = load_labelled_articles(args.fake_csv, args.true_csv, args.count)
+
+    def heavy_only(batch):
+        cleaned = [clean_text(text) for text in batch]
+        proba = second_stage.predict_proba(predictor.tfidf.transform(cleaned))
+        return [predictor._build_result(p[0], p[1], predictor._threshold(len(text.split())))
+                for p, text in zip(proba, cleaned)]
+
+    runs = (
+        ('LR only', lambda batch: predictor.predict_batch(batch)),
+        ('cascade', lambda batch: predictor.predict_batch(batch, cascade=True)),
+        (f'{args.second_stage} only', heavy_only),
+    )
+    for name, run in runs:
+        start = time.perf_counter()
+        results = []
+        for i in range(0, len(texts), args.batch_size):
+            results.extend(run(texts[i:i + args.batch_size]))
+        elapsed = time.perf_counter() - start
+
+        correct = sum(r['prediction'] == label for r, label in zip(results, labels))
+        line = (f"{name:24s} accuracy={correct / len(labels):.4f}  "
+                f"throughput={len(texts) / elapsed:9,.0f} articles/sec")
+        escalated = sum(1 for r in results if r.get('escalated'))
+        if name == 'cascade':
+            line += f"  escalated={escalated / len(results):.2%}"
+        print(line)
+
+
+def bench_results(args):
+    """Memory per million predictions: dicts vs Prediction objects vs columnar batch"""
+    import tracemalloc
+    import numpy as np
+    from src.results import BatchPredictions, Prediction
+
+    rng = np.random.default_rng(0)
+    real = rng.random(args.count)
+    fake = 1 - real
+    codes = (real > 0.5).astype(np.int8)
+    scale = 1_000_000 / args.count
+
+    def as_dicts():
+        return [
+            {
+                'prediction': int(c),
+                'label': 'Real' if c else 'Fake',
+                'confidence': round(float(max(r, f)) * 100, 2),
+                'probabilities': {'fake': round(float(f) * 100, 2), 'real': round(float(r) * 100, 2)},
+                'error': None,
+            }
+            for c, f, r in zip(codes, fake, real)
+        ]
+
+    def as_objects():
+        return [Prediction(int(c), float(f), float(r)) for c, f, r in zip(codes, fake, real)]
+
+    def as_batch():
+        return BatchPredictions(codes, np.column_stack([fake, real]), np.zeros(args.count, dtype=bool))
+
+    for name, build in (('dicts', as_dicts), ('Prediction', as_objects), ('BatchPredictions', as_batch)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        results = build()
+        elapsed = time.perf_counter() - start
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del results
+        print(f"{name:17s} {current * scale / 2 ** 20:9.1f} MiB per million  "
+              f"(built in {elapsed * scale:.2f}s per million)")
+
+
+def bench_overload(args):
+    """Text request latency while URL requests flood in, shared pool vs admission control"""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from src.admission import (
+        AdmissionController, DeadlineExceeded, Overloaded, deadline_after, TEXT_DEADLINE, URL_DEADLINE,
+    )
+    from src.extractor import extract_article_text
+    from src.predictor import FakeNewsPredictor
+
+    predictor = FakeNewsPredictor()
+    server, url = serve_stand_in_site(args.site_delay)
+    text = ('Officials said the report on the regional budget would be released next week '
+            'after a review of spending on schools, hospitals and roads.')
+
+    def url_work():
+        article = extract_article_text(url)
+        return predictor.predict(article['full_text'])
+
+    def text_work():
+        return predictor.predict(text)
+
+    def run_mode(submit_url, submit_text):
+        stop = threading.Event()
+        outcomes = Counter()
+        lock = threading.Lock()
+        latencies = []
+
+        def flood():
+            while not stop.is_set():
+                try:
+                    submit_url()
+                    outcome = 'completed'
+                except Overloaded:
+                    outcome = 'rejected'
+                    time.sleep(0.05)  # client backs off and retries
+                except DeadlineExceeded:
+                    outcome = 'deadline'
+                with lock:
+                    outcomes[outcome] += 1
+
+        def text_client():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    submit_text()
+                    latencies.append((time.perf_counter() - start) * 1000)
+                except (Overloaded, DeadlineExceeded):
+                    with lock:
+                        outcomes['text failed'] += 1
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=flood, daemon=True) for _ in range(args.url_clients)]
+        threads += [threading.Thread(target=text_client, daemon=True) for _ in range(args.text_clients)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return latencies, outcomes
+
+    try:
+        pool = ThreadPoolExecutor(max_workers=args.workers)
+        shared = run_mode(lambda: pool.submit(url_work).result(),
+                          lambda: pool.submit(text_work).result())
+        pool.shutdown()
+
+        controller = AdmissionController()
+        admitted = run_mode(
+            lambda: controller.run('url', url_work, deadline_after(URL_DEADLINE)),
+            lambda: controller.run('text', text_work, deadline_after(TEXT_DEADLINE)),
+        )
+
+        for name, (latencies, outcomes) in (('shared pool', shared), ('admission', admitted)):
+            if latencies:
+                stats = percentiles(latencies)
+                line = '  '.join(f"{k}={v:8.1f}ms" for k, v in stats.items())
+            else:
+                line = 'no text request completed'
+            print(f"{name:11s} text: n={len(latencies):4d}  {line}")
+            print(f"{'':11s} url:  {dict(outcomes)}")
+    finally:
+        server.shutdown()
+
+
+def bench_profiles(args):
+    """Extraction time and text agreement of learned domain profiles vs newspaper on saved pages"""
+    import os
+    from newspaper import Article
+    from src.extraction_profiles import ExtractionProfiles, text_agreement
+
+    # Corpus layout: <corpus>/<domain>/<page>.html, pages of a domain
+    # replayed in name order as if fetched from https://<domain>/<page>
+    pages = []
+    for domain in sorted(os.listdir(args.corpus)):
+        domain_dir = os.path.join(args.corpus, domain)
+        if not os.path.isdir(domain_dir):
+            continue
+        for name in sorted(os.listdir(domain_dir)):
+            if name.endswith('.html'):
+                with open(os.path.join(domain_dir, name), encoding='utf-8', errors='replace') as f:
+                    pages.append((f'https://{domain}/{name[:-5]}', f.read()))
+    if not pages:
+        print(f"No pages found under {args.corpus}")
+        return
+
+    profiles = ExtractionProfiles(path=None)
+    newspaper_ms, profile_ms, agreements = [], [], []
+    for url, html in pages:
+        start = time.perf_counter()
+        article = Article(url)
+        article.download(input_html=html)
+        article.parse()
+        newspaper_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        result = profiles.extract(url, html)
+        elapsed = (time.perf_counter() - start) * 1000
+        if result is None:
+            profiles.learn(url, html, article.text)
+        else:
+            profile_ms.append(elapsed)
+            agreements.append(text_agreement(result['text'], article.text))
+
+    def summary(samples):
+        stats = percentiles(samples)
+        return f"mean={sum(samples) / len(samples):7.2f}ms  " + '  '.join(
+            f"{k}={v:7.2f}ms" for k, v in stats.items())
+
+    print(f"pages: {len(pages)}  profile hits: {len(profile_ms)} ({len(profile_ms) / len(pages):.1%})  "
+          f"domains with a profile: {len(profiles.profiles)}")
+    print(f"newspaper  {summary(newspaper_ms)}")
+    if profile_ms:
+        print(f"profile    {summary(profile_ms)}")
+        print(f"agreement with newspaper (word Jaccard): mean={sum(agreements) / len(agreements):.3f}  "
+              f"min={min(agreements):.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    long_docs = sub.add_parser('long-docs', help=bench_long_documents.__doc__)
+    long_docs.add_argument('--count', type=int, default=50)
+    long_docs.add_argument('--min-words', type=int, default=5000)
+    long_docs.add_argument('--max-words', type=int, default=80000)
+    long_docs.add_argument('--max-tokens', type=int, default=5000)
+    long_docs.set_defaults(func=bench_long_documents)
+
+    urls = sub.add_parser('urls', help=bench_urls.__doc__)
+    urls.add_argument('--count', type=int, default=200000)
+    urls.add_argument('--duplicate-ratio', type=float, default=0.4)
+    urls.add_argument('--capacity', type=int, default=50000)
+    urls.add_argument('--error-rate', type=float, default=0.001)
+    urls.set_defaults(func=bench_urls)
+
+    analyze = sub.add_parser('analyze', help=bench_analyze.__doc__)
+    analyze.add_argument('--runs', type=int, default=20)
+    analyze.add_argument('--site-delay', type=float, default=0.2)
+    analyze.add_argument('--lookup-delay', type=float, default=0.15)
+    analyze.set_defaults(func=bench_analyze)
+
+    cascade = sub.add_parser('cascade', help=bench_cascade.__doc__)
+    cascade.add_argument('--fake-csv', default='data/raw/Fake.csv')
+    cascade.add_argument('--true-csv', default='data/raw/True.csv')
+    cascade.add_argument('--count', type=int, default=5000)
+    cascade.add_argument('--batch-size', type=int, default=256)
+    cascade.add_argument('--second-stage', default='Gradient_Boosting')
+    cascade.set_defaults(func=bench_cascade)
+
+    results = sub.add_parser('results', help=bench_results.__doc__)
+    results.add_argument('--count', type=int, default=1_000_000)
+    results.set_defaults(func=bench_results)
+
+    overload = sub.add_parser('overload', help=bench_overload.__doc__)
+    overload.add_argument('--duration', type=float, default=10.0)
+    overload.add_argument('--site-delay', type=float, default=2.0)
+    overload.add_argument('--url-clients', type=int, default=40)
+    overload.add_argument('--text-clients', type=int, default=4)
+    overload.add_argument('--workers', type=int, default=12, help='Shared pool size')
+    overload.set_defaults(func=bench_overload)
+
+    profiles = sub.add_parser('profiles', help=bench_profiles.__doc__)
+    profiles.add_argument('corpus', help='Directory of saved pages: <domain>/<page>.html')
+    profiles.set_defaults(func=bench_profiles)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
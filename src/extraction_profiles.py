@@ -0,0 +1,276 @@
+"""
+Learned per-domain extraction profiles
+
+For a domain we see often, the article body always sits under the same
+element. After newspaper3k extracts an article, the element holding that
+text is located and turned into a CSS selector. Once the same selector has
+worked on a few pages of the domain, later pages are extracted with that
+selector alone (compiled to XPath, run by lxml), skipping newspaper's
+generic content scoring. When a profile stops matching, extraction falls
+back to newspaper and the profile is learned again.
+"""
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+import lxml.html
+from lxml.cssselect import CSSSelector
+
+DEFAULT_PATH = 'data/extraction_profiles.json'
+MIN_CONFIRMATIONS = 2   # pages a selector must work on before it is used
+MIN_CHARS = 300         # shorter selector output counts as a miss
+MIN_COVERAGE = 0.9      # share of newspaper's words the element must contain
+MAX_MISSES = 2          # consecutive misses before a profile is dropped
+
+CANDIDATE_TAGS = ('article', 'main', 'section', 'div', 'td')
+WORD_RE = re.compile(r'\w+')
+
+def domain_of(url):
+    """Host of a URL without www., used as the profile key"""
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+def _words(text):
+    return WORD_RE.findall(text.lower())
+
+def element_text(element):
+    """
+    Article text under an element: its paragraphs if it has any, otherwise
+    all of its text, with whitespace collapsed
+    """
+    paragraphs = [' '.join(p.text_content().split()) for p in element.iter('p')]
+    paragraphs = [p for p in paragraphs if p]
+    if paragraphs:
+        return '\n\n'.join(paragraphs)
+    return ' '.join(element.text_content().split())
+
+def page_title(tree):
+    """Title from og:title, then the first h1, then <title>"""
+    for xpath in ('//meta[@property="og:title"]/@content', '//h1', '//title'):
+        found = tree.xpath(xpath)
+        if found:
+            value = found[0] if isinstance(found[0], str) else found[0].text_content()
+            value = ' '.join(value.split())
+            if value:
+                return value
+    return ''
+
+def text_agreement(a, b):
+    """Jaccard similarity of the word sets of two texts, 0-1"""
+    words_a, words_b = set(_words(a)), set(_words(b))
+    if not words_a and not words_b:
+        return 1.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def _selector_step(element):
+    # Ids and classes containing digits are usually generated per page
+    element_id = element.get('id')
+    if element_id and not re.search(r'\d', element_id):
+        return f'{element.tag}#{element_id}'
+    classes = [c for c in (element.get('class') or '').split() if not re.search(r'\d', c)]
+    return element.tag + ''.join(f'.{c}' for c in classes[:2])
+
+def selector_for(tree, element, max_depth=4):
+    """
+    Shortest child-combinator CSS selector that matches only `element`
+
+    Returns:
+        str: Selector, or None if none within max_depth steps is unique
+    """
+    steps = [_selector_step(element)]
+    node = element
+    while True:
+        selector = ' > '.join(steps)
+        matches = CSSSelector(selector)(tree)
+        if len(matches) == 1 and matches[0] is element:
+            return selector
+        node = node.getparent()
+        if node is None or len(steps) >= max_depth:
+            return None
+        steps.insert(0, _selector_step(node))
+
+def learn_selector(tree, text):
+    """
+    Find the tightest element containing newspaper's article text
+
+    Args:
+        tree: Parsed page (lxml.html)
+        text (str): Article text extracted by newspaper
+
+    Returns:
+        str: CSS selector for that element, or None
+    """
+    target = set(_words(text))
+    if not target:
+        return None
+
+    best, best_precision = None, 0.0
+    for element in tree.iter(*CANDIDATE_TAGS):
+        found = set(_words(element_text(element)))
+        if not found:
+            continue
+        common = len(found & target)
+        if common / len(target) < MIN_COVERAGE:
+            continue
+        precision = common / len(found)
+        # Document order visits descendants after ancestors, so >= keeps
+        # the deepest element among equally tight ones
+        if precision >= best_precision:
+            best, best_precision = element, precision
+
+    if best is None:
+        return None
+    return selector_for(tree, best)
+
+
+class ExtractionProfiles:
+    """
+    Per-domain selector profiles, persisted as JSON
+
+    Profile fields: selector, confirmations (pages it matched newspaper
+    on), hits and misses (fast-path outcomes), consecutive_misses.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, min_confirmations=MIN_CONFIRMATIONS,
+                 min_chars=MIN_CHARS, autosave=True):
+        """
+        Args:
+            path (str): JSON file profiles are loaded from and saved to, or
+                None to keep them in memory only
+            min_confirmations (int): Pages a selector must work on first
+            min_chars (int): Minimum text length for a fast-path hit
+            autosave (bool): Save after each change to a profile's selector
+        """
+        self.path = path
+        self.min_confirmations = min_confirmations
+        self.min_chars = min_chars
+        self.autosave = autosave
+        self.profiles = {}
+        self._compiled = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.profiles = json.load(f)
+
+    def _selector(self, selector):
+        compiled = self._compiled.get(selector)
+        if compiled is None:
+            compiled = self._compiled[selector] = CSSSelector(selector)
+        return compiled
+
+    def active_selector(self, url):
+        """Selector to use for this URL's domain, or None if not learned yet"""
+        profile = self.profiles.get(domain_of(url))
+        if profile and profile['confirmations'] >= self.min_confirmations:
+            return profile['selector']
+        return None
+
+    def extract(self, url, html):
+        """
+        Extract with the domain's learned selector
+
+        Args:
+            url (str): Article URL
+            html (str): Page HTML
+
+        Returns:
+            dict: Same shape as extract_article_text, or None when there is
+                no active profile or it did not match (a miss)
+        """
+        selector = self.active_selector(url)
+        if selector is None:
+            return None
+
+        tree = lxml.html.fromstring(html)
+        matches = self._selector(selector)(tree)
+        text = element_text(matches[0]) if len(matches) == 1 else ''
+        if len(text) < self.min_chars:
+            self._record_miss(url)
+            return None
+
+        with self._lock:
+            profile = self.profiles[domain_of(url)]
+            profile['hits'] += 1
+            profile['consecutive_misses'] = 0
+
+        title = page_title(tree)
+        return {
+            'title': title,
+            'text': text,
+            'authors': [],
+            'publish_date': None,
+            'full_text': f"{title}. {text}",
+            'success': True,
+            'error': None,
+            'method': 'profile',
+        }
+
+    def _record_miss(self, url):
+        domain = domain_of(url)
+        reset = False
+        with self._lock:
+            profile = self.profiles[domain]
+            profile['misses'] += 1
+            profile['consecutive_misses'] += 1
+            if profile['consecutive_misses'] >= MAX_MISSES:
+                # The site changed its layout; learn again from newspaper
+                profile['confirmations'] = 0
+                reset = True
+        # Counters alone are not worth a file write in the request path
+        if reset:
+            self._save()
+
+    def learn(self, url, html, text):
+        """
+        Learn from a successful newspaper extraction of this page
+
+        Args:
+            url (str): Article URL
+            html (str): Page HTML
+            text (str): Article text newspaper extracted
+        """
+        if not html or len(text or '') < self.min_chars:
+            return
+        tree = lxml.html.fromstring(html)
+        selector = learn_selector(tree, text)
+        if selector is None:
+            return
+
+        domain = domain_of(url)
+        changed = False
+        with self._lock:
+            profile = self.profiles.get(domain)
+            if profile is None or profile['selector'] != selector:
+                self.profiles[domain] = {
+                    'selector': selector,
+                    'confirmations': 1,
+                    'hits': profile['hits'] if profile else 0,
+                    'misses': profile['misses'] if profile else 0,
+                    'consecutive_misses': 0,
+                }
+                changed = True
+            else:
+                profile['confirmations'] += 1
+                profile['consecutive_misses'] = 0
+                changed = profile['confirmations'] == self.min_confirmations
+        if changed:
+            self._save()
+
+    def _save(self):
+        if not self.path or not self.autosave:
+            return
+        self.save()
+
+    def save(self, path=None):
+        """Write the profiles to JSON atomically"""
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.profiles, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
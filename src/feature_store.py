@@ -0,0 +1,269 @@
+"""
+Persistent store of TF-IDF rows for re-scoring the archive
+
+When only the classifier is retrained, articles do not need to be
+re-extracted, re-cleaned or re-vectorised: the CSR rows saved while
+scoring are memory-mapped and multiplied by the new model's weights.
+
+Layout, one directory per vectorizer fingerprint:
+
+    <root>/<fingerprint>/shard-000000/
+        ids.npy lengths.npy data.npy indices.npy indptr.npy meta.json
+
+Usage:
+    python -m src.feature_store score articles.csv --out scores.parquet
+    python -m src.feature_store rescore --model model/new_model.pkl --out scores.parquet
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import numpy as np
+from scipy import sparse
+
+DEFAULT_ROOT = 'data/features'
+SHARD_ROWS = 50000
+
+def vectorizer_fingerprint(tfidf):
+    """
+    Identify a fitted vectorizer by its parameters, vocabulary and idf
+
+    Returns:
+        str: Short hex digest; equal for vectorizers that produce the same rows
+    """
+    digest = hashlib.sha256()
+    params = {k: v for k, v in tfidf.get_params().items() if k != 'dtype'}
+    digest.update(repr(sorted(params.items())).encode('utf-8'))
+    for term, index in sorted(tfidf.vocabulary_.items()):
+        digest.update(f'{term}\0{index}\n'.encode('utf-8'))
+    if getattr(tfidf, 'idf_', None) is not None:
+        digest.update(np.ascontiguousarray(tfidf.idf_, dtype=np.float64).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class FeatureStore:
+    """
+    Append-only, sharded store of CSR TF-IDF rows keyed by article id
+    """
+
+    def __init__(self, tfidf, root=DEFAULT_ROOT, shard_rows=SHARD_ROWS):
+        """
+        Args:
+            tfidf: Fitted vectorizer the rows come from
+            root (str): Base directory of the store
+            shard_rows (int): Rows buffered before a shard is written
+        """
+        self.fingerprint = vectorizer_fingerprint(tfidf)
+        self.n_features = len(tfidf.vocabulary_)
+        self.directory = os.path.join(root, self.fingerprint)
+        self.shard_rows = shard_rows
+        self._pending = []
+        self._pending_rows = 0
+        self._index = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def shard_paths(self):
+        """Directories of the shards written so far, oldest first"""
+        return [
+            os.path.join(self.directory, name)
+            for name in sorted(os.listdir(self.directory))
+            if name.startswith('shard-') and not name.endswith('.tmp')
+        ]
+
+    def append(self, ids, matrix, lengths):
+        """
+        Buffer rows and write a shard whenever shard_rows are buffered
+
+        Args:
+            ids (list): Article id per row
+            matrix (scipy.sparse matrix): TF-IDF rows
+            lengths (list): Word count of the cleaned text per row, used
+                to pick the decision threshold when re-scoring
+        """
+        if matrix.shape[0] != len(ids) or len(ids) != len(lengths):
+            raise ValueError('ids, matrix rows and lengths must have the same length')
+        self._pending.append((np.asarray(ids, dtype=str), sparse.csr_matrix(matrix),
+                              np.asarray(lengths, dtype=np.int32)))
+        self._pending_rows += len(ids)
+        if self._pending_rows >= self.shard_rows:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as a new shard"""
+        if not self._pending:
+            return
+        ids = np.concatenate([p[0] for p in self._pending])
+        matrix = sparse.vstack([p[1] for p in self._pending], format='csr')
+        lengths = np.concatenate([p[2] for p in self._pending])
+        self._pending = []
+        self._pending_rows = 0
+
+        name = f'shard-{len(self.shard_paths()):06d}'
+        final_path = os.path.join(self.directory, name)
+        tmp_path = final_path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, 'ids.npy'), ids)
+        np.save(os.path.join(tmp_path, 'lengths.npy'), lengths)
+        np.save(os.path.join(tmp_path, 'data.npy'), matrix.data.astype(np.float32))
+        np.save(os.path.join(tmp_path, 'indices.npy'), matrix.indices.astype(np.int32))
+        np.save(os.path.join(tmp_path, 'indptr.npy'), matrix.indptr.astype(np.int64))
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({'rows': matrix.shape[0], 'n_features': self.n_features}, f)
+        # A shard becomes visible only once it is complete
+        os.replace(tmp_path, final_path)
+        self._index = None
+
+    @staticmethod
+    def load_shard(path):
+        """
+        Memory-map one shard
+
+        Returns:
+            tuple: (ids, csr_matrix, lengths)
+        """
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode='r')
+        matrix = sparse.csr_matrix(
+            (load('data.npy'), load('indices.npy'), load('indptr.npy')),
+            shape=(meta['rows'], meta['n_features']), copy=False,
+        )
+        return load('ids.npy'), matrix, load('lengths.npy')
+
+    def shards(self):
+        """Yield (ids, csr_matrix, lengths) per shard"""
+        for path in self.shard_paths():
+            yield self.load_shard(path)
+
+    def get(self, article_id):
+        """
+        Look up the stored row of one article (the latest if stored twice)
+
+        Returns:
+            scipy.sparse.csr_matrix: 1 x n_features row, or None
+        """
+        if self._index is None:
+            self._index = {}
+            for path in self.shard_paths():
+                ids = np.load(os.path.join(path, 'ids.npy'))
+                for row, key in enumerate(ids.tolist()):
+                    self._index[key] = (path, row)
+        location = self._index.get(str(article_id))
+        if location is None:
+            return None
+        path, row = location
+        return self.load_shard(path)[1][row]
+
+    def __len__(self):
+        total = self._pending_rows
+        for path in self.shard_paths():
+            with open(os.path.join(path, 'meta.json')) as f:
+                total += json.load(f)['rows']
+        return total
+
+
+def rescore(store, model):
+    """
+    Score every stored row with a classifier, shard by shard
+
+    A linear model is applied as one sparse matrix-vector product per
+    shard; anything else goes through predict_proba.
+
+    Args:
+        store (FeatureStore): Store built with the classifier's vectorizer
+        model: Fitted binary classifier
+
+    Yields:
+        tuple: (ids, BatchPredictions) per shard
+    """
+    from src.predictor import FakeNewsPredictor
+    from src.results import BatchPredictions
+
+    coef = None
+    if hasattr(model, 'coef_') and model.coef_.shape[0] == 1:
+        coef = np.asarray(model.coef_[0], dtype=np.float64)
+        intercept = float(model.intercept_[0])
+
+    for ids, matrix, lengths in store.shards():
+        if coef is not None:
+            real = 1.0 / (1.0 + np.exp(-(matrix @ coef + intercept)))
+            proba = np.column_stack([1.0 - real, real])
+        else:
+            proba = model.predict_proba(matrix)
+        thresholds = FakeNewsPredictor._thresholds(lengths)
+        codes, uncertain = FakeNewsPredictor._decide_batch(proba, thresholds)
+        yield ids, BatchPredictions(codes, proba, uncertain)
+
+
+def _write_scores(chunks, out):
+    """Concatenate (ids, BatchPredictions) chunks into one Parquet file"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for ids, batch in chunks:
+            table = batch.to_arrow()
+            table = table.add_column(0, 'id', pa.array(np.asarray(ids).tolist(), type=pa.string()))
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score articles into the feature store, or re-score it')
+    parser.add_argument('--root', default=DEFAULT_ROOT, help='Feature store directory')
+    parser.add_argument('--tfidf', default='model/tfidf_vectorizer.pkl')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    score = sub.add_parser('score', help='Score a CSV of articles and store their TF-IDF rows')
+    score.add_argument('csv', help='CSV with id and text columns')
+    score.add_argument('--model', default='model/model.pkl')
+    score.add_argument('--id-column', default='id')
+    score.add_argument('--text-column', default='text')
+    score.add_argument('--batch-size', type=int, default=1000)
+    score.add_argument('--out', required=True, help='Parquet file for the scores')
+
+    re_score = sub.add_parser('rescore', help='Re-score the stored rows with another classifier')
+    re_score.add_argument('--model', required=True, help='Pickled classifier')
+    re_score.add_argument('--out', required=True, help='Parquet file for the scores')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'score':
+        import pandas as pd
+        from src.predictor import FakeNewsPredictor
+
+        predictor = FakeNewsPredictor(model_path=args.model, tfidf_path=args.tfidf)
+        store = FeatureStore(predictor.tfidf, args.root)
+
+        def chunks():
+            for frame in pd.read_csv(args.csv, chunksize=args.batch_size):
+                ids = frame[args.id_column].astype(str).tolist()
+                texts = frame[args.text_column].fillna('').tolist()
+                yield ids, predictor.predict_batch(texts, ids=ids, feature_store=store)
+
+        _write_scores(chunks(), args.out)
+        store.flush()
+        print(f"✓ {len(store)} rows in {store.directory}")
+    else:
+        with open(args.tfidf, 'rb') as f:
+            tfidf = pickle.load(f)
+        with open(args.model, 'rb') as f:
+            model = pickle.load(f)
+        store = FeatureStore(tfidf, args.root)
+        if not store.shard_paths():
+            print(f"⚠ No stored rows for vectorizer {store.fingerprint}; run 'score' first.")
+            return
+        _write_scores(rescore(store, model), args.out)
+        print(f"✓ Re-scored {len(store)} rows from {store.directory}")
+
+
+if __name__ == '__main__':
+    main()
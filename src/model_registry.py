@@ -0,0 +1,270 @@
+"""
+Hot reload of the model without restarting the app
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.predictor import FakeNewsPredictor, SECOND_STAGE_FILE
+
+MODEL_FILE = 'model.pkl'
+TFIDF_FILE = 'tfidf_vectorizer.pkl'
+VERSIONS_DIR = 'versions'
+MAX_SHADOW_PENDING = 8  # shadow predictions queued at once; more are skipped
+
+class ModelRegistry:
+    """
+    Serves predictions from the active model and swaps in new versions
+
+    A background thread watches the model directory. New versions are
+    either the flat model/model.pkl + model/tfidf_vectorizer.pkl pair
+    changing on disk, or a new subdirectory of model/versions/ (the
+    lexically greatest name wins). A new version is loaded on the watcher
+    thread, optionally shadow-scored against a sample of live traffic, and
+    then swapped in by replacing a single reference, so predictions in
+    flight keep the predictor they started with. Only the active and at
+    most one candidate predictor are kept alive.
+
+    Deploying into model/versions/<name>/ is preferred: the flat files can
+    be picked up between the model and the vectorizer being replaced. A
+    version's cascade second stage is read from all_models.pkl in its own
+    directory, never from another version's, since it has to match that
+    version's vectorizer; without one, cascade mode does not escalate.
+    """
+
+    def __init__(self, model_dir='model', poll_interval=30.0, shadow_fraction=0.0,
+                 shadow_samples=200, min_agreement=0.0, watch=True):
+        """
+        Args:
+            model_dir (str): Directory holding the model files
+            poll_interval (float): Seconds between checks for a new version
+            shadow_fraction (float): Share of live predictions also scored by
+                a candidate version before it is promoted; 0 promotes at once
+            shadow_samples (int): Shadow predictions needed before promotion
+            min_agreement (float): Minimum label agreement with the active
+                model for a shadowed candidate to be promoted
+            watch (bool): Start the background watcher thread
+        """
+        self.model_dir = model_dir
+        self.poll_interval = poll_interval
+        self.shadow_fraction = shadow_fraction
+        self.shadow_samples = shadow_samples
+        self.min_agreement = min_agreement
+
+        self._lock = threading.Lock()
+        self._active = None
+        self._active_version = None
+        self._candidate = None
+        self._candidate_version = None
+        self._rejected_version = None
+        self._shadow_stats = None
+        self._last_shadow = None
+        self._shadow_pending = 0
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow')
+        self._stop = threading.Event()
+        self._thread = None
+
+        version, paths = self._latest_version()
+        if version is None:
+            raise FileNotFoundError(f'No model files found in {model_dir}')
+        self._active = self._load(paths)
+        self._active_version = version
+
+        if watch:
+            self._thread = threading.Thread(target=self._watch, name='model-watcher', daemon=True)
+            self._thread.start()
+
+    @property
+    def version(self):
+        """Identifier of the version currently serving predictions"""
+        return self._active_version
+
+    def _latest_version(self):
+        """
+        Find the newest model version on disk
+
+        Returns:
+            tuple: (version string, (model_path, tfidf_path,
+                second_stage_path)), or (None, None)
+        """
+        versions_dir = os.path.join(self.model_dir, VERSIONS_DIR)
+        if os.path.isdir(versions_dir):
+            for name in sorted(os.listdir(versions_dir), reverse=True):
+                directory = os.path.join(versions_dir, name)
+                paths = (os.path.join(directory, MODEL_FILE),
+                         os.path.join(directory, TFIDF_FILE),
+                         os.path.join(directory, SECOND_STAGE_FILE))
+                if all(os.path.exists(p) for p in paths[:2]):
+                    return name, paths
+
+        paths = (os.path.join(self.model_dir, MODEL_FILE), os.path.join(self.model_dir, TFIDF_FILE),
+                 os.path.join(self.model_dir, SECOND_STAGE_FILE))
+        if not all(os.path.exists(p) for p in paths[:2]):
+            return None, None
+        stats = [os.stat(p) for p in paths[:2]]
+        version = '-'.join(f'{int(s.st_mtime)}.{s.st_size}' for s in stats)
+        return version, paths
+
+    @staticmethod
+    def _load(paths):
+        predictor = FakeNewsPredictor(model_path=paths[0], tfidf_path=paths[1],
+                                      second_stage_path=paths[2])
+        if predictor.model is None or predictor.tfidf is None:
+            raise RuntimeError(f'Could not load model from {paths[0]}')
+        return predictor
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                print(f"✗ Error reloading model: {str(e)}")
+
+    def check_for_update(self):
+        """
+        Load a new version if one is on disk
+
+        Called periodically by the watcher thread; can also be called
+        directly, e.g. right after deploying a new model.
+
+        Returns:
+            bool: True if a new version was loaded
+        """
+        version, paths = self._latest_version()
+        if version in (None, self._active_version, self._candidate_version, self._rejected_version):
+            return False
+
+        # Loading can take seconds; it happens here, outside the lock
+        candidate = self._load(paths)
+        print(f"✓ Loaded model version {version}")
+
+        if self.shadow_fraction > 0:
+            with self._lock:
+                self._candidate = candidate
+                self._candidate_version = version
+                self._shadow_stats = {'samples': 0, 'agree': 0, 'skipped': 0,
+                                      'active_seconds': 0.0, 'candidate_seconds': 0.0}
+        else:
+            self._promote(candidate, version)
+        return True
+
+    def _finish_shadow(self, version, outcome):
+        """Keep the candidate's shadow results for status() and log them"""
+        with self._lock:
+            summary = self._shadow_summary(version, outcome)
+            self._last_shadow = summary
+        print(f"{'✓' if outcome == 'promoted' else '⚠'} Model version {version} {outcome}: "
+              f"agreement {summary['agreement']:.2%} over {summary['samples']} samples, "
+              f"{summary['active_ms']:.1f}ms active vs {summary['candidate_ms']:.1f}ms candidate")
+
+    def _shadow_summary(self, version, outcome):
+        stats = self._shadow_stats
+        n = stats['samples']
+        return {
+            'version': version,
+            'outcome': outcome,
+            'samples': n,
+            'skipped': stats['skipped'],
+            'agreement': stats['agree'] / n if n else 0.0,
+            'active_ms': stats['active_seconds'] / n * 1000 if n else 0.0,
+            'candidate_ms': stats['candidate_seconds'] / n * 1000 if n else 0.0,
+        }
+
+    def _promote(self, predictor, version):
+        with self._lock:
+            # A single reference assignment: callers that already fetched the
+            # old predictor finish with it, then it is garbage collected
+            self._active = predictor
+            self._active_version = version
+            self._candidate = None
+            self._candidate_version = None
+        print(f"✓ Serving model version {version}")
+
+    def _shadow(self, candidate, version, text, active_result, active_seconds):
+        try:
+            start = time.perf_counter()
+            shadow_result = candidate.predict(text)
+            candidate_seconds = time.perf_counter() - start
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+
+        with self._lock:
+            if self._candidate is not candidate:
+                return
+            stats = self._shadow_stats
+            stats['samples'] += 1
+            stats['agree'] += shadow_result.get('label') == active_result.get('label')
+            stats['active_seconds'] += active_seconds
+            stats['candidate_seconds'] += candidate_seconds
+            if stats['samples'] < self.shadow_samples:
+                return
+            agreement = stats['agree'] / stats['samples']
+
+        if agreement >= self.min_agreement:
+            self._finish_shadow(version, 'promoted')
+            self._promote(candidate, version)
+        else:
+            self._finish_shadow(version, 'rejected')
+            with self._lock:
+                self._candidate = None
+                self._candidate_version = None
+                self._rejected_version = version
+
+    def predict(self, text, **kwargs):
+        """
+        Predict with the active model; see FakeNewsPredictor.predict
+
+        A sample of calls is also scored by the candidate version on a
+        background thread so the caller never waits for it. At most
+        MAX_SHADOW_PENDING of those wait at a time, each holding its text;
+        further samples are skipped rather than queued.
+        """
+        active = self._active
+        start = time.perf_counter()
+        result = active.predict(text, **kwargs)
+        active_seconds = time.perf_counter() - start
+
+        candidate, version = self._candidate, self._candidate_version
+        if candidate is not None and random.random() < self.shadow_fraction:
+            with self._lock:
+                queue_full = self._shadow_pending >= MAX_SHADOW_PENDING
+                if queue_full:
+                    if self._candidate is candidate:
+                        self._shadow_stats['skipped'] += 1
+                else:
+                    self._shadow_pending += 1
+            if not queue_full:
+                try:
+                    self._shadow_executor.submit(self._shadow, candidate, version, text, result,
+                                                 active_seconds)
+                except RuntimeError:
+                    # Executor shut down by close()
+                    with self._lock:
+                        self._shadow_pending -= 1
+        return result
+
+    def status(self):
+        """
+        Returns:
+            dict: active and candidate versions and shadow statistics of the
+                running or, if none is running, the last finished shadow
+                trial (version, outcome 'running', 'promoted' or 'rejected',
+                samples, skipped, agreement, mean latency of each model in ms)
+        """
+        with self._lock:
+            status = {
+                'active_version': self._active_version,
+                'candidate_version': self._candidate_version,
+                'rejected_version': self._rejected_version,
+                'shadow': self._last_shadow,
+            }
+            if self._candidate is not None:
+                status['shadow'] = self._shadow_summary(self._candidate_version, 'running')
+        return status
+
+    def close(self):
+        """Stop the watcher thread"""
+        self._stop.set()
+        self._shadow_executor.shutdown(wait=False)
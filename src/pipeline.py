@@ -0,0 +1,151 @@
+"""
+Run the URL analyze flow as a small concurrent pipeline
+"""
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from src.admission import check_deadline
+from src.extractor import extract_article_text
+from src.fact_check import search_fact_check
+from src.profiling import set_request_profiling, reset_request_profiling
+from src.related_news import search_related_news
+
+# Per-stage timeouts in seconds
+EXTRACT_TIMEOUT = 20
+PREDICT_TIMEOUT = 10
+LOOKUP_TIMEOUT = 5
+
+# Shared by all sessions of the process so concurrent analyses do not each
+# spin up their own threads
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix='analyze')
+
+def _submit(fn, arg, deadline, stage):
+    # Each task runs in a copy of the caller's context so per-request
+    # settings (e.g. profiling) reach the worker threads
+    def run():
+        check_deadline(deadline, stage)
+        return fn(arg)
+    return _executor.submit(contextvars.copy_context().run, run)
+
+def _wait(future, stage_deadline, deadline):
+    if deadline is not None:
+        stage_deadline = min(stage_deadline, deadline)
+    return future.result(timeout=max(0.0, stage_deadline - time.monotonic()))
+
+def analyze_url(url, predict, extract=extract_article_text, related=search_related_news,
+                fact_check=search_fact_check, extract_timeout=EXTRACT_TIMEOUT,
+                predict_timeout=PREDICT_TIMEOUT, lookup_timeout=LOOKUP_TIMEOUT, profile=None,
+                deadline=None):
+    """
+    Extract an article, then score it while related-news and fact-check
+    lookups for its title run in parallel
+
+    Each stage has its own timeout. Extraction or prediction failing ends
+    the analysis with an error; a lookup failing only leaves its list
+    empty and is recorded in 'degraded'.
+
+    Args:
+        url (str): URL of the news article
+        predict (callable): Takes the article text, returns a prediction dict
+        extract (callable): Takes the URL, returns an article dict
+        related (callable): Takes the title, returns related news links
+        fact_check (callable): Takes the title, returns fact-check links
+        extract_timeout (float): Seconds allowed for extraction
+        predict_timeout (float): Seconds allowed for prediction
+        lookup_timeout (float): Seconds allowed for each lookup
+        profile (bool): Profile every stage of this request; None samples
+            according to the environment (see src.profiling)
+        deadline (float): Absolute time.monotonic() deadline for the whole
+            request; stages are cut short at it and not started after it
+
+    Returns:
+        dict: article, prediction, related, fact_checks, error (str or
+            None), error_stage ('extract' or 'prediction'), degraded (dict
+            of lookup name to reason) and timings (dict of stage name to
+            seconds)
+    """
+    token = set_request_profiling(profile)
+    try:
+        return _analyze_url(url, predict, extract, related, fact_check,
+                            extract_timeout, predict_timeout, lookup_timeout, deadline)
+    finally:
+        reset_request_profiling(token)
+
+def _analyze_url(url, predict, extract, related, fact_check,
+                 extract_timeout, predict_timeout, lookup_timeout, deadline):
+    analysis = {
+        'article': None,
+        'prediction': None,
+        'related': [],
+        'fact_checks': [],
+        'error': None,
+        'error_stage': None,
+        'degraded': {},
+        'timings': {},
+    }
+    start = time.monotonic()
+
+    # 1. Extract article
+    analysis['error_stage'] = 'extract'
+    try:
+        article = _wait(_submit(extract, url, deadline, 'extraction'),
+                        start + extract_timeout, deadline)
+    except TimeoutError:
+        if deadline is not None and time.monotonic() >= deadline:
+            analysis['error'] = 'Request deadline passed during extraction.'
+        else:
+            analysis['error'] = f'Extraction timed out after {extract_timeout}s.'
+        return analysis
+    except Exception as e:
+        analysis['error'] = str(e)
+        return analysis
+    analysis['timings']['extract'] = time.monotonic() - start
+    analysis['article'] = article
+
+    if not article.get('success') or not article.get('full_text'):
+        analysis['error'] = article.get('error') or 'Unknown error.'
+        return analysis
+
+    # 2. Predict and look up the title at the same time
+    analysis['error_stage'] = 'prediction'
+    title = article.get('title') or 'Untitled article'
+    stage_start = time.monotonic()
+    futures = {
+        'prediction': (_submit(predict, article['full_text'], deadline, 'prediction'), predict_timeout),
+        'related': (_submit(related, title, deadline, 'related news'), lookup_timeout),
+        'fact_checks': (_submit(fact_check, title, deadline, 'fact check'), lookup_timeout),
+    }
+
+    # Finish times are captured as each future completes, but only copied
+    # into the result for stages that finished before their wait ended;
+    # late callbacks must not touch a result that may already be rendered
+    finished = {}
+    for stage, (future, _) in futures.items():
+        future.add_done_callback(
+            lambda f, stage=stage: finished.__setitem__(stage, time.monotonic() - stage_start)
+        )
+
+    for stage, (future, timeout) in futures.items():
+        try:
+            analysis[stage] = _wait(future, stage_start + timeout, deadline)
+            analysis['timings'][stage] = finished.get(stage, time.monotonic() - stage_start)
+        except TimeoutError:
+            future.cancel()
+            if stage == 'prediction':
+                analysis['error'] = f'Prediction timed out after {timeout}s.'
+            else:
+                analysis['degraded'][stage] = f'timed out after {timeout}s'
+        except Exception as e:
+            analysis['timings'][stage] = finished.get(stage, time.monotonic() - stage_start)
+            if stage == 'prediction':
+                analysis['error'] = str(e)
+            else:
+                analysis['degraded'][stage] = str(e)
+
+    if analysis['error'] is None and analysis['prediction'].get('error'):
+        analysis['error'] = analysis['prediction']['error']
+    if analysis['error'] is None:
+        analysis['error_stage'] = None
+
+    analysis['timings']['total'] = time.monotonic() - start
+    return analysis
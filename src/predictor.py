@@ -3,25 +3,61 @@ Load trained model and make predictions
 """
 import pickle
 import os
+import math
+import re
+import threading
+import numpy as np
 from src.utils import clean_text
+from src.profiling import profiled
+from src.results import Prediction, BatchPredictions
+
+# Long-document mode: texts longer than this (in characters) are scored
+# window by window instead of in one TF-IDF transform
+LONG_DOCUMENT_CHARS = 20000
+LONG_DOCUMENT_WINDOW = 500       # tokens per window
+LONG_DOCUMENT_TOLERANCE = 0.005  # max change in P(real) between windows
+LONG_DOCUMENT_PATIENCE = 3       # consecutive stable windows before stopping
+LONG_DOCUMENT_MAX_TOKENS = 5000  # hard token budget
+LONG_DOCUMENT_CHARS_PER_TOKEN = 32  # raw characters kept per budgeted token
+
+# Cascade mode: items the linear model is unsure about are re-scored by a
+# heavier model from the notebook's all_models.pkl, loaded on first use.
+# It is read from the model's own directory, since it has to be trained on
+# the same vectorizer
+SECOND_STAGE_FILE = 'all_models.pkl'
+SECOND_STAGE_NAME = 'Gradient_Boosting'
 
 class FakeNewsPredictor:
     """
     Predictor class for fake news detection
     """
     
-    def __init__(self, model_path='model/model.pkl', tfidf_path='model/tfidf_vectorizer.pkl'):
+    def __init__(self, model_path='model/model.pkl', tfidf_path='model/tfidf_vectorizer.pkl',
+                 second_stage_path=None, second_stage_name=SECOND_STAGE_NAME):
         """
         Initialize the predictor with saved model and vectorizer
         
         Args:
             model_path (str): Path to saved model file
             tfidf_path (str): Path to saved TF-IDF vectorizer file
+            second_stage_path (str): Pickle with the cascade's second-stage
+                model, either the model itself or a dict of models; defaults
+                to all_models.pkl next to model_path
+            second_stage_name (str): Key of the model to use when
+                second_stage_path holds a dict
         """
         self.model = None
         self.tfidf = None
         self.model_path = model_path
         self.tfidf_path = tfidf_path
+        if second_stage_path is None:
+            second_stage_path = os.path.join(os.path.dirname(model_path), SECOND_STAGE_FILE)
+        self.second_stage_path = second_stage_path
+        self.second_stage_name = second_stage_name
+        self._second_stage = None
+        self._second_stage_checked = False
+        self._second_stage_lock = threading.Lock()
+        self._incremental = None
         
         # Load model and vectorizer
         self.load_model()
@@ -38,92 +74,371 @@ class FakeNewsPredictor:
                 with open(self.tfidf_path, 'rb') as f:
                     self.tfidf = pickle.load(f)
                 
+                self._incremental = self._build_incremental_scorer()
                 print("✓ Model and vectorizer loaded successfully")
             else:
                 print("⚠ Model files not found. Please train the model first.")
         except Exception as e:
             print(f"✗ Error loading model: {str(e)}")
     
-    def predict(self, text):
+    def _build_incremental_scorer(self):
+        """
+        Precompute what the long-document mode needs to score text without
+        going through tfidf.transform
+
+        Only plain word-unigram, L2-normalised TF-IDF in front of a binary
+        linear model can be accumulated token by token; anything else
+        returns None and long documents are scored in one transform.
+        """
+        tfidf, model = self.tfidf, self.model
+        params = tfidf.get_params()
+        if (params['analyzer'] != 'word' or params['tokenizer'] is not None
+                or params['preprocessor'] is not None or params['stop_words'] is not None
+                or params['strip_accents'] is not None
+                or tuple(params['ngram_range']) != (1, 1) or params['norm'] != 'l2'
+                or params['sublinear_tf'] or params['binary']):
+            return None
+        if not hasattr(model, 'coef_') or model.coef_.shape[0] != 1:
+            return None
+
+        coef = model.coef_[0]
+        if params['use_idf']:
+            idf = tfidf.idf_
+        else:
+            idf = [1.0] * len(coef)
+        return {
+            'token_pattern': re.compile(params['token_pattern']),
+            'lowercase': params['lowercase'],
+            'vocabulary': tfidf.vocabulary_,
+            'idf': idf,
+            'coef': coef,
+            'intercept': float(model.intercept_[0]),
+        }
+
+    def _score_incremental(self, text, window, tolerance, patience, max_tokens):
+        """
+        Score text window by window, stopping early once P(real) is stable
+
+        Keeps the running TF-IDF dot product with the model weights and the
+        running squared norm, so each window costs O(window) and the final
+        probability equals a full transform of the tokens read.
+
+        Returns:
+            tuple: (fake_prob, real_prob, info dict)
+        """
+        scorer = self._incremental
+        vocabulary = scorer['vocabulary']
+        idf = scorer['idf']
+        coef = scorer['coef']
+        if scorer['lowercase']:
+            text = text.lower()
+
+        counts = {}
+        dot = 0.0
+        sq_norm = 0.0
+        tokens_read = 0
+        windows = 0
+        stable = 0
+        real_prob = None
+        stop_reason = 'exhausted'
+        in_window = 0
+
+        for match in scorer['token_pattern'].finditer(text):
+            tokens_read += 1
+            in_window += 1
+            index = vocabulary.get(match.group())
+            if index is not None:
+                c = counts.get(index, 0)
+                counts[index] = c + 1
+                weight = idf[index]
+                dot += weight * coef[index]
+                sq_norm += weight * weight * (2 * c + 1)
+
+            if in_window < window and tokens_read < max_tokens:
+                continue
+
+            in_window = 0
+            windows += 1
+            previous = real_prob
+            real_prob = self._sigmoid(dot, sq_norm, scorer['intercept'])
+            if previous is not None and abs(real_prob - previous) <= tolerance:
+                stable += 1
+            else:
+                stable = 0
+            if stable >= patience:
+                stop_reason = 'converged'
+                break
+            if tokens_read >= max_tokens:
+                stop_reason = 'budget'
+                break
+
+        if stop_reason == 'exhausted':
+            if in_window:
+                windows += 1
+            real_prob = self._sigmoid(dot, sq_norm, scorer['intercept'])
+
+        return 1.0 - real_prob, real_prob, {
+            'stop_reason': stop_reason,
+            'tokens_read': tokens_read,
+            'windows': windows,
+        }
+
+    def load_second_stage(self):
+        """
+        Load the cascade's second-stage model on first use
+
+        The model must have been trained on this predictor's vectorizer: a
+        dict pickle may carry a 'vectorizer_fingerprint' entry (see
+        src.feature_store.vectorizer_fingerprint) that has to match, and the
+        model's input width must equal the vocabulary size.
+
+        Returns:
+            The model, or None if it is not available or does not match
+        """
+        if not self._second_stage_checked:
+            with self._second_stage_lock:
+                if not self._second_stage_checked:
+                    self._second_stage = self._read_second_stage()
+                    self._second_stage_checked = True
+        return self._second_stage
+
+    def _read_second_stage(self):
+        if not self.tfidf or not os.path.exists(self.second_stage_path):
+            return None
+        try:
+            with open(self.second_stage_path, 'rb') as f:
+                model = pickle.load(f)
+            fingerprint = None
+            if isinstance(model, dict):
+                fingerprint = model.get('vectorizer_fingerprint')
+                model = model.get(self.second_stage_name)
+            if model is None:
+                return None
+
+            from src.feature_store import vectorizer_fingerprint
+            n_features = getattr(model, 'n_features_in_', None)
+            if ((fingerprint is not None and fingerprint != vectorizer_fingerprint(self.tfidf))
+                    or (n_features is not None and n_features != len(self.tfidf.vocabulary_))):
+                print(f"⚠ Second-stage model in {self.second_stage_path} was trained on a "
+                      f"different vectorizer; cascade disabled")
+                return None
+            return model
+        except Exception as e:
+            print(f"✗ Error loading second-stage model: {str(e)}")
+            return None
+
+    @staticmethod
+    def _threshold(text_length):
+        """Decision threshold for a text of `text_length` words"""
+        # Adjust threshold based on text length - be very conservative
+        if text_length < 30:
+            # For short text, require very high confidence for "Fake"
+            return 0.85
+        elif text_length < 150:
+            # For medium text, still very conservative
+            return 0.75
+        else:
+            # For longer articles, still conservative
+            return 0.65
+
+    @staticmethod
+    def _thresholds(lengths):
+        """Decision thresholds for an array of word counts, as _threshold"""
+        lengths = np.asarray(lengths)
+        return np.select([lengths < 30, lengths < 150], [0.85, 0.75], 0.65)
+
+    @staticmethod
+    def _decide_batch(proba, thresholds):
+        """
+        Vectorised form of _build_result
+
+        Returns:
+            tuple: (label codes, uncertain flags) as arrays
+        """
+        is_real = proba[:, 1] > thresholds
+        is_fake = ~is_real & (proba[:, 0] > thresholds)
+        # Uncertain case - default to Real to avoid false alarms
+        return np.where(is_fake, 0, 1), ~is_real & ~is_fake
+
+    @staticmethod
+    def _build_result(fake_prob, real_prob, threshold):
+        if real_prob > threshold:
+            return Prediction(1, fake_prob, real_prob)
+        elif fake_prob > threshold:
+            return Prediction(0, fake_prob, real_prob)
+        else:
+            # Uncertain case - default to Real to avoid false alarms
+            return Prediction(1, fake_prob, real_prob, uncertain=True)
+
+    @staticmethod
+    def _sigmoid(dot, sq_norm, intercept):
+        z = (dot / math.sqrt(sq_norm) if sq_norm else 0.0) + intercept
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    @profiled('predict', input_size=lambda self, text, *args, **kwargs: len(text or ''))
+    def predict(self, text, long_document=None, window=LONG_DOCUMENT_WINDOW,
+                tolerance=LONG_DOCUMENT_TOLERANCE, patience=LONG_DOCUMENT_PATIENCE,
+                max_tokens=LONG_DOCUMENT_MAX_TOKENS, cascade=False):
         """
         Predict whether the given text is fake or real news
         
         Args:
             text (str): Article text to classify
+            long_document (bool): Score window by window with early exit.
+                None (default) enables it for texts over LONG_DOCUMENT_CHARS
+            window (int): Tokens per window in long-document mode
+            tolerance (float): Stop once P(real) moves less than this between
+                windows for `patience` consecutive windows
+            patience (int): Stable windows required before stopping
+            max_tokens (int): Token budget in long-document mode
+            cascade (bool): Re-score with the second-stage model when
+                neither probability clears the threshold
             
         Returns:
-            dict: Dictionary containing prediction and confidence score
+            Prediction: Prediction and confidence score; reads like the
+                dict from Prediction.to_dict(). In long-document mode it
+                also has a 'long_document' entry with stop_reason
+                ('converged', 'budget' or 'exhausted'), tokens_read and
+                windows. In cascade mode 'escalated' tells whether the
+                second stage was used
         """
         if not self.model or not self.tfidf:
-            return {
-                'prediction': 'Error',
-                'label': 'Model not loaded',
-                'confidence': 0.0,
-                'error': 'Model or vectorizer not loaded properly'
-            }
+            return Prediction.failure('Model not loaded', 'Model or vectorizer not loaded properly')
         
         try:
+            if long_document is None:
+                long_document = bool(text) and len(text) > LONG_DOCUMENT_CHARS
+            long_document = long_document and self._incremental is not None
+            
+            # In long-document mode never clean more text than the token
+            # budget can reach
+            truncated = False
+            if long_document:
+                limit = max_tokens * LONG_DOCUMENT_CHARS_PER_TOKEN
+                if len(text) > limit:
+                    text = text[:limit]
+                    truncated = True
+            
             # Clean the text
             cleaned_text = clean_text(text)
             
             if not cleaned_text:
-                return {
-                    'prediction': 'Error',
-                    'label': 'Invalid input',
-                    'confidence': 0.0,
-                    'error': 'Text is empty after cleaning'
-                }
+                return Prediction.failure('Invalid input', 'Text is empty after cleaning')
             
-            # Transform text using TF-IDF
-            text_vector = self.tfidf.transform([cleaned_text])
+            long_document_info = None
             
-            # Get probability scores
-            proba = self.model.predict_proba(text_vector)[0]
-            fake_prob = proba[0]  # Probability of being fake (class 0)
-            real_prob = proba[1]  # Probability of being real (class 1)
+            if long_document:
+                fake_prob, real_prob, long_document_info = self._score_incremental(
+                    cleaned_text, window, tolerance, patience, max_tokens
+                )
+                if truncated and long_document_info['stop_reason'] == 'exhausted':
+                    long_document_info['stop_reason'] = 'budget'
+            else:
+                # Transform text using TF-IDF
+                text_vector = self.tfidf.transform([cleaned_text])
+                
+                # Get probability scores
+                proba = self.model.predict_proba(text_vector)[0]
+                fake_prob = proba[0]  # Probability of being fake (class 0)
+                real_prob = proba[1]  # Probability of being real (class 1)
             
-            # Adjust threshold based on text length - be very conservative
-            text_length = len(cleaned_text.split())
+            threshold = self._threshold(len(cleaned_text.split()))
             
-            if text_length < 30:
-                # For short text, require very high confidence for "Fake"
-                threshold = 0.85
-            elif text_length < 150:
-                # For medium text, still very conservative
-                threshold = 0.75
-            else:
-                # For longer articles, still conservative
-                threshold = 0.65
+            escalated = False
+            if cascade and max(fake_prob, real_prob) <= threshold:
+                second_stage = self.load_second_stage()
+                if second_stage is not None:
+                    if long_document:
+                        text_vector = self.tfidf.transform([cleaned_text])
+                    fake_prob, real_prob = second_stage.predict_proba(text_vector)[0]
+                    escalated = True
+            
+            result = self._build_result(fake_prob, real_prob, threshold)
+            if cascade:
+                result.escalated = escalated
+            result.long_document = long_document_info
+            
+            return result
+            
+        except Exception as e:
+            return Prediction.failure('Prediction failed', str(e))
+    
+    @profiled('predict_batch', input_size=lambda self, texts, *args, **kwargs: len(texts))
+    def predict_batch(self, texts, cascade=False, ids=None, feature_store=None):
+        """
+        Predict a list of texts with one TF-IDF transform
+        
+        In cascade mode the uncertain items are collected and sent to the
+        second-stage model together, so it runs once per batch.
+        
+        Args:
+            texts (list): Article texts to classify
+            cascade (bool): Re-score uncertain items with the second stage
+            ids (list): Article ids, required with feature_store
+            feature_store (FeatureStore): Store the TF-IDF rows here so the
+                articles can be re-scored later without re-cleaning
             
-            if real_prob > threshold:
-                prediction = 1
-                label = 'Real'
-                confidence = real_prob * 100
-            elif fake_prob > threshold:
-                prediction = 0
-                label = 'Fake'
-                confidence = fake_prob * 100
+        Returns:
+            BatchPredictions: Columnar results; iterating yields one
+                Prediction per text
+        
+        Raises:
+            ValueError: feature_store is given without one id per text
+        """
+        if feature_store is not None and (ids is None or len(ids) != len(texts)):
+            raise ValueError('predict_batch needs one id per text to use a feature_store')
+        
+        if not self.model or not self.tfidf:
+            return BatchPredictions.failed(
+                len(texts), 'Model not loaded', 'Model or vectorizer not loaded properly'
+            )
+        
+        n = len(texts)
+        codes = np.full(n, -1, dtype=np.int8)
+        probabilities = np.zeros((n, 2), dtype=np.float32)
+        uncertain = np.zeros(n, dtype=bool)
+        escalated = np.zeros(n, dtype=bool) if cascade else None
+        errors = {}
+        
+        cleaned, positions = [], []
+        for i, text in enumerate(texts):
+            cleaned_text = clean_text(text)
+            if cleaned_text:
+                cleaned.append(cleaned_text)
+                positions.append(i)
             else:
-                # Uncertain case - default to Real to avoid false alarms
-                prediction = 1
-                label = 'Real'
-                confidence = max(real_prob, 51.0) * 100
+                errors[i] = ('Invalid input', 'Text is empty after cleaning')
+        if not cleaned:
+            return BatchPredictions(codes, probabilities, uncertain, escalated, errors)
+        positions = np.array(positions)
+        
+        try:
+            vectors = self.tfidf.transform(cleaned)
+            lengths = np.array([len(text.split()) for text in cleaned])
+            proba = self.model.predict_proba(vectors)
+            thresholds = self._thresholds(lengths)
             
-            return {
-                'prediction': prediction,
-                'label': label,
-                'confidence': round(confidence, 2),
-                'probabilities': {
-                    'fake': round(fake_prob * 100, 2),
-                    'real': round(real_prob * 100, 2)
-                },
-                'error': None
-            }
+            if cascade:
+                unsure = np.flatnonzero(proba.max(axis=1) <= thresholds)
+                second_stage = self.load_second_stage() if len(unsure) else None
+                if second_stage is not None:
+                    proba[unsure] = second_stage.predict_proba(vectors[unsure])
+                    escalated[positions[unsure]] = True
             
+            codes[positions], uncertain[positions] = self._decide_batch(proba, thresholds)
+            probabilities[positions] = proba
         except Exception as e:
-            return {
-                'prediction': 'Error',
-                'label': 'Prediction failed',
-                'confidence': 0.0,
-                'error': str(e)
-            }
+            for i in positions:
+                errors[int(i)] = ('Prediction failed', str(e))
+            return BatchPredictions(codes, probabilities, uncertain, escalated, errors)
+        
+        # Only rows that were scored are stored for re-scoring. Storage
+        # errors (e.g. OSError writing a shard) propagate: the predictions
+        # themselves are fine
+        if feature_store is not None:
+            feature_store.append([ids[i] for i in positions], vectors, lengths)
+        
+        return BatchPredictions(codes, probabilities, uncertain, escalated, errors)
@@ -0,0 +1,280 @@
+"""
+On-demand profiling of the analyze path
+
+Profiling is off unless switched on for a request (profile=True), for a
+random share of calls (FAKE_NEWS_PROFILE_RATE) or for every call
+(FAKE_NEWS_PROFILE=1). Each profiled stage writes one file to
+FAKE_NEWS_PROFILE_DIR named <stage>-<input size>-<timestamp>:
+
+    sample mode   (default) .collapsed - "frame;frame;frame count" lines,
+                  ready for flamegraph.pl or speedscope
+    cprofile mode .pstats - cProfile dump, readable with pstats
+
+Aggregate a directory of dumps into the top-N hot functions with:
+    python -m src.profiling profiles/ -n 20
+"""
+import argparse
+import cProfile
+import contextvars
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_ENV = 'FAKE_NEWS_PROFILE'
+RATE_ENV = 'FAKE_NEWS_PROFILE_RATE'
+MODE_ENV = 'FAKE_NEWS_PROFILE_MODE'
+DIR_ENV = 'FAKE_NEWS_PROFILE_DIR'
+DEFAULT_DIR = 'profiles'
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+
+# Per-request switch; copied into worker threads with contextvars so the
+# stages of one request share the decision
+_request_profile = contextvars.ContextVar('request_profile', default=None)
+_active = threading.local()
+
+def profiling_requested(enabled=None):
+    """
+    Decide whether to profile the current call
+
+    Args:
+        enabled (bool): Explicit per-request switch; None defers to the
+            enclosing request, then to the environment
+
+    Returns:
+        bool: True if the call should be profiled
+    """
+    if enabled is not None:
+        return enabled
+    request = _request_profile.get()
+    if request is not None:
+        return request
+    if os.environ.get(PROFILE_ENV, '') not in ('', '0'):
+        return True
+    rate = _profile_rate()
+    return rate > 0 and random.random() < rate
+
+def _profile_rate():
+    # A malformed rate must not fail the request being scored
+    try:
+        return float(os.environ.get(RATE_ENV, 0) or 0)
+    except ValueError:
+        return 0.0
+
+def set_request_profiling(enabled):
+    """
+    Fix the profiling decision for the rest of the current request
+
+    Returns:
+        contextvars.Token: Pass to reset_request_profiling when done
+    """
+    return _request_profile.set(profiling_requested(enabled))
+
+def reset_request_profiling(token):
+    _request_profile.reset(token)
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread from a background thread
+
+    Cheaper than cProfile because the profiled thread is never
+    instrumented; cost is one sys._current_frames() call per interval.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            # A sample taken after stop() shows the profiled thread waiting
+            # in join() for this thread, not the profiled stage
+            if stack and not self._stop.is_set():
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class profile_stage:
+    """
+    Context manager that profiles a block of one pipeline stage
+
+    Usage:
+        with profile_stage('extract') as prof:
+            ...
+            prof.input_size = len(text)
+
+    Nested stages in the same thread are covered by the outermost one.
+    """
+
+    def __init__(self, stage, input_size=0, enabled=None):
+        """
+        Args:
+            stage (str): Stage name used in the dump file name
+            input_size (int): Size of the input (e.g. characters), can also
+                be set on the returned object before the block ends
+            enabled (bool): Per-call switch; see profiling_requested
+        """
+        self.stage = stage
+        self.input_size = input_size
+        self.enabled = enabled
+        self.path = None
+        self._profiler = None
+
+    def __enter__(self):
+        if getattr(_active, 'stage', None) is not None or not profiling_requested(self.enabled):
+            return self
+        if os.environ.get(MODE_ENV, 'sample') == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another cProfile session is running (one per process on
+                # Python 3.12+); skip rather than fail the request
+                return self
+            self._profiler = profiler
+        else:
+            self._profiler = StackSampler(threading.get_ident())
+            self._profiler.start()
+        _active.stage = self.stage
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profiler is None:
+            return False
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.disable()
+        else:
+            self._profiler.stop()
+        _active.stage = None
+
+        try:
+            directory = os.environ.get(DIR_ENV, DEFAULT_DIR)
+            os.makedirs(directory, exist_ok=True)
+            name = f'{self.stage}-{self.input_size}-{time.time_ns()}'
+            if isinstance(self._profiler, cProfile.Profile):
+                self.path = os.path.join(directory, name + '.pstats')
+                self._profiler.dump_stats(self.path)
+            else:
+                self.path = os.path.join(directory, name + '.collapsed')
+                self._profiler.write(self.path)
+        except OSError as e:
+            print(f"✗ Error writing profile: {str(e)}")
+        return False
+
+
+def profiled(stage, input_size=None):
+    """
+    Decorator form of profile_stage
+
+    Args:
+        stage (str): Stage name used in the dump file name
+        input_size (callable): Called with the function's arguments,
+            returns the input size for the file name
+
+    The wrapped function accepts an extra `profile` keyword (True/False)
+    to switch profiling on or off for that call.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, profile=None, **kwargs):
+            size = input_size(*args, **kwargs) if input_size else 0
+            with profile_stage(stage, size, enabled=profile):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def top_functions(directory, n=20):
+    """
+    Aggregate profile dumps into the hottest functions
+
+    Args:
+        directory (str): Directory holding .collapsed and/or .pstats files
+        n (int): Number of functions to return
+
+    Returns:
+        dict: 'samples' - list of (function, self samples, total samples)
+            from .collapsed files; 'cprofile' - list of (function, tottime,
+            cumtime) from .pstats files
+    """
+    import pstats
+
+    self_counts, total_counts = Counter(), Counter()
+    pstats_files = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith('.collapsed'):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    if not stack:
+                        continue
+                    frames = stack.split(';')
+                    count = int(count)
+                    self_counts[frames[-1]] += count
+                    for frame in set(frames):
+                        total_counts[frame] += count
+        elif name.endswith('.pstats'):
+            pstats_files.append(path)
+
+    result = {
+        'samples': [(func, count, total_counts[func]) for func, count in self_counts.most_common(n)],
+        'cprofile': [],
+    }
+    if pstats_files:
+        stats = pstats.Stats(*pstats_files)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:n]
+        for (filename, line, func), (_, _, tottime, cumtime, _) in rows:
+            result['cprofile'].append((f'{func} ({os.path.basename(filename)}:{line})', tottime, cumtime))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Top-N hot functions from profile dumps')
+    parser.add_argument('directory', nargs='?', default=os.environ.get(DIR_ENV, DEFAULT_DIR))
+    parser.add_argument('-n', type=int, default=20, help='Number of functions to show')
+    args = parser.parse_args(argv)
+
+    top = top_functions(args.directory, args.n)
+    if top['samples']:
+        print(f"{'self':>8s} {'total':>8s}  function (stack samples)")
+        for func, count, total in top['samples']:
+            print(f"{count:8d} {total:8d}  {func}")
+    if top['cprofile']:
+        print(f"{'tottime':>9s} {'cumtime':>9s}  function (cProfile)")
+        for func, tottime, cumtime in top['cprofile']:
+            print(f"{tottime:9.4f} {cumtime:9.4f}  {func}")
+    if not top['samples'] and not top['cprofile']:
+        print(f"No profile dumps found in {args.directory}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""
+Compact prediction results
+
+Prediction holds one result in a few slots instead of nested dicts, and
+BatchPredictions holds a whole batch as NumPy columns. Both convert to
+the dict shape the app has always used only when asked (to_dict, or any
+read through the Mapping interface of a Prediction), so callers reading
+result['label'], 'error' in result or dict(result) keep working.
+"""
+import os
+from collections.abc import Mapping
+import numpy as np
+
+LABELS = {0: 'Fake', 1: 'Real'}
+ERROR_CODE = -1
+
+class Prediction(Mapping):
+    """
+    Result of a single prediction
+
+    A read-only Mapping over to_dict(), so it can be used wherever the dict
+    predict used to return was.
+
+    Attributes:
+        code (int): 0 fake, 1 real, -1 error
+        fake_prob (float): Probability of fake, 0-1
+        real_prob (float): Probability of real, 0-1
+        uncertain (bool): Neither probability cleared the threshold, so the
+            label defaulted to Real
+        label (str): 'Fake', 'Real', or the error label
+        error (str): Error message, or None
+        escalated (bool): Cascade mode only; None otherwise
+        long_document (dict): Long-document mode info, or None
+    """
+
+    __slots__ = ('code', 'fake_prob', 'real_prob', 'uncertain', 'label', 'error',
+                 'escalated', 'long_document')
+
+    def __init__(self, code, fake_prob=0.0, real_prob=0.0, uncertain=False, label=None,
+                 error=None, escalated=None, long_document=None):
+        self.code = code
+        self.fake_prob = fake_prob
+        self.real_prob = real_prob
+        self.uncertain = uncertain
+        self.label = label if label is not None else LABELS.get(code)
+        self.error = error
+        self.escalated = escalated
+        self.long_document = long_document
+
+    @classmethod
+    def failure(cls, label, error):
+        """Result for a text that could not be scored"""
+        return cls(ERROR_CODE, label=label, error=error)
+
+    @property
+    def confidence(self):
+        """Confidence in percent, as shown in the app"""
+        if self.code == ERROR_CODE:
+            return 0.0
+        if self.uncertain:
+            return max(self.real_prob, 51.0) * 100
+        return (self.real_prob if self.code == 1 else self.fake_prob) * 100
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: The result in the shape predict has always returned
+        """
+        if self.code == ERROR_CODE:
+            return {
+                'prediction': 'Error',
+                'label': self.label,
+                'confidence': 0.0,
+                'error': self.error
+            }
+        result = {
+            'prediction': self.code,
+            'label': self.label,
+            'confidence': round(float(self.confidence), 2),
+            'probabilities': {
+                'fake': round(float(self.fake_prob) * 100, 2),
+                'real': round(float(self.real_prob) * 100, 2)
+            },
+            'error': None
+        }
+        if self.escalated is not None:
+            result['escalated'] = self.escalated
+        if self.long_document is not None:
+            result['long_document'] = self.long_document
+        return result
+
+    def __getitem__(self, key):
+        return self.to_dict()[key]
+
+    def __iter__(self):
+        return iter(self.to_dict())
+
+    def __len__(self):
+        return len(self.to_dict())
+
+    def __contains__(self, key):
+        return key in self.to_dict()
+
+    def get(self, key, default=None):
+        return self.to_dict().get(key, default)
+
+    def __repr__(self):
+        return f'Prediction({self.to_dict()!r})'
+
+
+class BatchPredictions:
+    """
+    Columnar results of predict_batch
+
+    Attributes:
+        codes (np.ndarray): int8 per item - 0 fake, 1 real, -1 error
+        probabilities (np.ndarray): float32 (n, 2) - P(fake), P(real)
+        uncertain (np.ndarray): bool per item, see Prediction.uncertain
+        escalated (np.ndarray): bool per item in cascade mode, else None
+        errors (dict): index -> (label, message) for items that failed
+    """
+
+    def __init__(self, codes, probabilities, uncertain, escalated=None, errors=None):
+        self.codes = np.asarray(codes, dtype=np.int8)
+        self.probabilities = np.asarray(probabilities, dtype=np.float32)
+        self.uncertain = np.asarray(uncertain, dtype=bool)
+        self.escalated = None if escalated is None else np.asarray(escalated, dtype=bool)
+        self.errors = errors or {}
+
+    @classmethod
+    def failed(cls, count, label, error):
+        """Batch where every item failed with the same error"""
+        return cls(
+            np.full(count, ERROR_CODE), np.zeros((count, 2)), np.zeros(count, dtype=bool),
+            errors={i: (label, error) for i in range(count)},
+        )
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index in self.errors:
+            return Prediction.failure(*self.errors[index])
+        fake_prob, real_prob = self.probabilities[index]
+        return Prediction(
+            int(self.codes[index]), float(fake_prob), float(real_prob),
+            bool(self.uncertain[index]),
+            escalated=None if self.escalated is None else bool(self.escalated[index]),
+        )
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def nbytes(self):
+        """Memory held by the columns (errors excluded)"""
+        arrays = [self.codes, self.probabilities, self.uncertain]
+        if self.escalated is not None:
+            arrays.append(self.escalated)
+        return sum(a.nbytes for a in arrays)
+
+    def to_dicts(self):
+        """
+        Returns:
+            list: One dict per item, in the shape predict returns
+        """
+        return [prediction.to_dict() for prediction in self]
+
+    def _error_messages(self):
+        messages = np.full(len(self), None, dtype=object)
+        for index, (_, message) in self.errors.items():
+            messages[index] = message
+        return messages
+
+    def to_npy(self, directory):
+        """
+        Write each column to <directory>/<column>.npy (errors as error.npy,
+        an object array that needs np.load(..., allow_pickle=True))
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'codes.npy'), self.codes)
+        np.save(os.path.join(directory, 'probabilities.npy'), self.probabilities)
+        np.save(os.path.join(directory, 'uncertain.npy'), self.uncertain)
+        if self.escalated is not None:
+            np.save(os.path.join(directory, 'escalated.npy'), self.escalated)
+        if self.errors:
+            np.save(os.path.join(directory, 'error.npy'), self._error_messages())
+
+    def to_arrow(self):
+        """
+        Returns:
+            pyarrow.Table: One row per item
+        """
+        import pyarrow as pa
+
+        columns = {
+            'code': pa.array(self.codes),
+            'fake_prob': pa.array(self.probabilities[:, 0]),
+            'real_prob': pa.array(self.probabilities[:, 1]),
+            'uncertain': pa.array(self.uncertain),
+        }
+        if self.escalated is not None:
+            columns['escalated'] = pa.array(self.escalated)
+        columns['error'] = pa.array(self._error_messages(), type=pa.string())
+        return pa.table(columns)
+
+    def to_parquet(self, path):
+        """Write the batch to a Parquet file (requires pyarrow)"""
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path)
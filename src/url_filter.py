@@ -0,0 +1,229 @@
+"""
+Drop already-processed URLs before they are fetched
+
+Feeds repeat the same article many times with tracking parameters,
+fragments and AMP/mobile variants. URLs are canonicalised first and then
+checked against a scalable Bloom filter of URLs that were fetched
+successfully, persisted between runs. A URL is only recorded once its fetch
+succeeded, because a Bloom filter cannot forget it again.
+"""
+import hashlib
+import json
+import math
+import os
+from src.utils import canonicalize_url
+
+class BloomFilter:
+    """
+    Fixed-capacity Bloom filter over a bytearray
+    """
+
+    def __init__(self, capacity, error_rate):
+        """
+        Args:
+            capacity (int): Number of items the filter is sized for
+            error_rate (float): False-positive rate at full capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def contains(self, digest):
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+    def add(self, digest):
+        bits = self.bits
+        for p in self._positions(digest):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows by adding slices instead of saturating
+
+    Each new slice has `growth` times the capacity of the previous one and a
+    tighter error rate (multiplied by `tightening`), so the overall
+    false-positive rate stays below `error_rate` however many URLs are added.
+    """
+
+    def __init__(self, initial_capacity=100000, error_rate=0.001, growth=2, tightening=0.5):
+        """
+        Args:
+            initial_capacity (int): Capacity of the first slice
+            error_rate (float): Upper bound on the overall false-positive rate
+            growth (int): Capacity multiplier for each new slice
+            tightening (float): Error-rate multiplier for each new slice
+        """
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+
+    @staticmethod
+    def _digest(item):
+        return hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+
+    def __contains__(self, item):
+        digest = self._digest(item)
+        return any(f.contains(digest) for f in reversed(self.filters))
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    def add(self, item):
+        """
+        Add an item
+
+        Returns:
+            bool: True if the item was new, False if it was (probably) seen
+        """
+        digest = self._digest(item)
+        if any(f.contains(digest) for f in reversed(self.filters)):
+            return False
+
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            n = len(self.filters)
+            self.filters.append(BloomFilter(
+                self.initial_capacity * self.growth ** n,
+                self.error_rate * (1 - self.tightening) * self.tightening ** n,
+            ))
+        self.filters[-1].add(digest)
+        return True
+
+    def dump(self, f):
+        """
+        Write the filter to a binary file: one JSON header line with the
+        parameters and slice sizes, then the raw bit array of each slice
+        """
+        header = {
+            'initial_capacity': self.initial_capacity,
+            'error_rate': self.error_rate,
+            'growth': self.growth,
+            'tightening': self.tightening,
+            'slices': [
+                {'capacity': s.capacity, 'error_rate': s.error_rate, 'count': s.count,
+                 'num_bits': s.num_bits, 'num_hashes': s.num_hashes}
+                for s in self.filters
+            ],
+        }
+        f.write(json.dumps(header).encode('utf-8') + b'\n')
+        for s in self.filters:
+            f.write(s.bits)
+
+    @classmethod
+    def load(cls, f):
+        """Read a filter written by dump()"""
+        header = json.loads(f.readline())
+        bloom = cls(header['initial_capacity'], header['error_rate'],
+                    header['growth'], header['tightening'])
+        for meta in header['slices']:
+            s = BloomFilter(meta['capacity'], meta['error_rate'])
+            if (s.num_bits, s.num_hashes) != (meta['num_bits'], meta['num_hashes']):
+                raise ValueError('URL filter file does not match this BloomFilter layout')
+            s.bits = bytearray(f.read(len(s.bits)))
+            if len(s.bits) != (s.num_bits + 7) // 8:
+                raise ValueError('URL filter file is truncated')
+            s.count = meta['count']
+            bloom.filters.append(s)
+        return bloom
+
+
+class UrlDeduplicator:
+    """
+    Front stage for feed ingestion: validate, canonicalise and drop URLs
+    that were already processed, before any network fetch
+
+    The canonical form is only a dedup key (it forces https and drops
+    www./m./amp. hosts), so the raw URL is what gets fetched.
+
+    Usage:
+        for url, canonical in dedup.filter(feed_urls):
+            if fetch(url) succeeded:
+                dedup.mark_processed(canonical)
+        dedup.save()
+    """
+
+    def __init__(self, path=None, initial_capacity=100000, error_rate=0.001):
+        """
+        Args:
+            path (str): File the filter is loaded from and saved to, or None
+                for an in-memory filter
+            initial_capacity (int): Capacity of the first filter slice
+            error_rate (float): Overall false-positive rate
+        """
+        self.path = path
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.processed = ScalableBloomFilter.load(f)
+        else:
+            self.processed = ScalableBloomFilter(initial_capacity, error_rate)
+
+    def seen(self, url):
+        """
+        Canonicalise a URL and check it against the processed URLs
+
+        Nothing is recorded; call mark_processed once the fetch succeeded.
+
+        Args:
+            url (str): Raw URL from a feed
+
+        Returns:
+            str: Canonical URL if it is valid and not processed yet,
+                otherwise None
+        """
+        canonical = canonicalize_url(url)
+        if canonical is None or canonical in self.processed:
+            return None
+        return canonical
+
+    def mark_processed(self, canonical):
+        """
+        Record a canonical URL (as returned by seen or filter) whose fetch
+        succeeded, so later runs skip it
+        """
+        self.processed.add(canonical)
+
+    def filter(self, urls):
+        """
+        Yield each valid URL not processed before, once per call even if
+        the feed repeats it (the first variant seen is kept)
+
+        Args:
+            urls (iterable): Raw URLs from a feed
+
+        Yields:
+            tuple: (raw URL to fetch, canonical URL for mark_processed)
+        """
+        pending = set()
+        for url in urls:
+            canonical = self.seen(url)
+            if canonical is not None and canonical not in pending:
+                pending.add(canonical)
+                yield url, canonical
+
+    def save(self, path=None):
+        """
+        Persist the filter so the next run skips the same URLs
+
+        Written to a temporary file and renamed so a crash never leaves a
+        truncated filter behind.
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError('No path given for the URL filter')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            self.processed.dump(f)
+        os.replace(tmp_path, path)
@@ -3,6 +3,7 @@ Utility functions for the fake news detection system
 """
 import re
 import string
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 def clean_text(text):
     """
@@ -31,6 +32,27 @@ def clean_text(text):
     
     return text
 
+# Compiled once at import; validate_url is called for every submitted URL
+URL_PATTERN = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
+# Query parameters that only track the click and never change the article
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'mc_cid', 'mc_eid', 'ref', 'ref_src'}
+TRACKING_PREFIXES = ('utm_',)
+
+# Host prefixes used for mobile/AMP mirrors of the same article
+MIRROR_HOST_PREFIXES = ('www.', 'm.', 'mobile.', 'amp.')
+
+# story/amp/ and story.amp -> story, story.amp.html -> story.html
+AMP_PATH_SUFFIX = re.compile(r'(?:/amp/?|\.amp)(\.html?)?$', re.IGNORECASE)
+AMP_PATH_PREFIX = re.compile(r'^/amp(?=/)', re.IGNORECASE)
+AMP_QUERY_PARAMS = {'amp', 'outputtype', '_gsa'}
+
 def validate_url(url):
     """
     Validate if a string is a proper URL
@@ -41,12 +63,61 @@ def validate_url(url):
     Returns:
         bool: True if valid URL, False otherwise
     """
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    
-    return url_pattern.match(url) is not None
+    return URL_PATTERN.match(url) is not None
+
+def canonicalize_url(url):
+    """
+    Reduce a URL to a canonical form so variants of one article compare equal
+    
+    Lowercases scheme and host, upgrades http to https, drops default ports,
+    fragments, tracking parameters (utm_*, fbclid, ...) and mobile/AMP
+    mirrors, unwraps Google AMP cache links and sorts the query string.
+    
+    Args:
+        url (str): URL to canonicalise
+        
+    Returns:
+        str: Canonical URL, or None if the URL is not valid
+    """
+    url = url.strip()
+    if not validate_url(url):
+        return None
+    
+    parts = urlsplit(url)
+    host = (parts.hostname or '').rstrip('.')
+    path = parts.path
+    
+    # Google AMP cache: https://www.google.com/amp/s/example.com/story
+    # and https://example-com.cdn.ampproject.org/c/s/example.com/story
+    is_google = host == 'google.com' or host.endswith('.google.com')
+    if (is_google and path.startswith('/amp/')) or host.endswith('.cdn.ampproject.org'):
+        inner = re.sub(r'^/(?:amp/|[a-z]/)*(?:s/)?', '', path)
+        if inner and inner != path:
+            return canonicalize_url('https://' + inner + (('?' + parts.query) if parts.query else ''))
+    
+    for prefix in MIRROR_HOST_PREFIXES:
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    
+    try:
+        port = parts.port
+    except ValueError:
+        # Port out of range, e.g. http://example.com:99999/
+        return None
+    if port and port not in (80, 443):
+        host = f'{host}:{port}'
+    
+    path = AMP_PATH_SUFFIX.sub(r'\1', path)
+    path = AMP_PATH_PREFIX.sub('', path)
+    path = re.sub(r'/{2,}', '/', path).rstrip('/') or '/'
+    
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+        and key.lower() not in AMP_QUERY_PARAMS
+        and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    
+    return urlunsplit(('https', host, path, urlencode(query), ''))
@@ -0,0 +1,47 @@
+import os
+import pickle
+import random
+import sys
+import pytest
+
+# Make `src` and app.py importable when pytest is run from any directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+FAKE_WORDS = 'shocking secret miracle hoax banned exposed cure conspiracy'.split()
+REAL_WORDS = 'ministry budget parliament statement announced official report council'.split()
+COMMON_WORDS = 'the of and to in news people said today year'.split()
+
+
+def synthetic_article(words, n, rng):
+    return ' '.join(rng.choice(words + COMMON_WORDS) for _ in range(n))
+
+
+@pytest.fixture(scope='session')
+def write_model():
+    """
+    Returns a function writing a small TF-IDF + logistic regression model,
+    fitted on synthetic fake/real text, as model.pkl and
+    tfidf_vectorizer.pkl into a directory
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    def write(directory, seed=0):
+        rng = random.Random(seed)
+        texts = [synthetic_article(FAKE_WORDS, 80, rng) for _ in range(50)] + \
+                [synthetic_article(REAL_WORDS, 80, rng) for _ in range(50)]
+        tfidf = TfidfVectorizer()
+        model = LogisticRegression().fit(tfidf.fit_transform(texts), [0] * 50 + [1] * 50)
+
+        os.makedirs(directory, exist_ok=True)
+        paths = {'model_path': os.path.join(directory, 'model.pkl'),
+                 'tfidf_path': os.path.join(directory, 'tfidf_vectorizer.pkl')}
+        with open(paths['model_path'], 'wb') as f:
+            pickle.dump(model, f)
+        with open(paths['tfidf_path'], 'wb') as f:
+            pickle.dump(tfidf, f)
+        return paths
+
+    return write
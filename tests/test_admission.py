@@ -0,0 +1,84 @@
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.admission import AdmissionController, DeadlineExceeded, Overloaded, deadline_after
+
+
+def wait_for_capacity(lane, expected, timeout=5.0):
+    end = time.monotonic() + timeout
+    while lane._slots._value != expected and time.monotonic() < end:
+        time.sleep(0.01)
+    return lane._slots._value
+
+
+def test_timed_out_queued_requests_return_their_slots():
+    controller = AdmissionController(lanes={'url': (1, 2)})
+    lane = controller.lanes['url']
+    release = threading.Event()
+
+    # Occupy the only worker, then time out two queued requests
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        blocker = pool.submit(controller.run, 'url', release.wait, deadline_after(10))
+        while lane._slots._value != 2:
+            time.sleep(0.01)
+        for _ in range(2):
+            with pytest.raises(DeadlineExceeded):
+                controller.run('url', lambda: 'late', deadline_after(0.05))
+        release.set()
+        assert blocker.result() == (True, False)
+
+    assert wait_for_capacity(lane, 3) == 3
+    assert lane.stats['shed'] == 2
+
+
+def test_lane_recovers_full_capacity_after_a_flood():
+    workers, queue_size = 2, 3
+    controller = AdmissionController(lanes={'url': (workers, queue_size)})
+    lane = controller.lanes['url']
+
+    def slow():
+        time.sleep(0.05)
+        return 'done'
+
+    def request(_):
+        try:
+            return controller.run('url', slow, deadline_after(0.08))[0]
+        except (Overloaded, DeadlineExceeded) as e:
+            return type(e).__name__
+
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        outcomes = list(pool.map(request, range(200)))
+
+    assert 'done' in outcomes and 'Overloaded' in outcomes
+    assert wait_for_capacity(lane, workers + queue_size) == workers + queue_size
+
+    # Once the flood is over the lane admits work again
+    assert controller.run('url', lambda: 'ok', deadline_after(1)) == ('ok', False)
+
+
+def test_stats_can_be_read_while_lanes_are_busy():
+    controller = AdmissionController(lanes={'url': (2, 2)})
+    stop = threading.Event()
+
+    def read_stats():
+        while not stop.is_set():
+            controller.stats()
+
+    def request(_):
+        try:
+            controller.run('url', lambda: time.sleep(0.001), deadline_after(1))
+        except Overloaded:
+            pass
+
+    reader = threading.Thread(target=read_stats)
+    reader.start()
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(request, range(400)))
+    finally:
+        stop.set()
+        reader.join()
+
+    stats = controller.stats()['url']
+    assert stats['admitted'] + stats.get('rejected', 0) == 400
@@ -0,0 +1,134 @@
+"""
+The app's expensive stages should run once per distinct input, however
+often Streamlit reruns the script.
+"""
+import os
+from collections import Counter
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+URL = 'https://www.example.com/news/story?utm_source=feed'
+TEXT = 'Government announces new budget for schools and hospitals across the country.'
+
+
+class FakePredictor:
+    version = 'test'
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def predict(self, text, **kwargs):
+        self.calls['predict'] += 1
+        return {'label': 'Real', 'confidence': 90.0, 'error': None}
+
+
+class FakeProfiles:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = Counter()
+
+    def extract(url, **kwargs):
+        calls['extract'] += 1
+        return {
+            'title': 'Budget announced',
+            'text': TEXT,
+            'authors': [],
+            'publish_date': None,
+            'full_text': f'Budget announced. {TEXT}',
+            'success': True,
+            'error': None,
+        }
+
+    def related(query):
+        calls['related'] += 1
+        return []
+
+    def fact_check(query):
+        calls['fact_check'] += 1
+        return []
+
+    # app.py imports these names on every run, so patching the modules is enough
+    monkeypatch.setattr('src.extractor.extract_article_text', extract)
+    monkeypatch.setattr('src.related_news.search_related_news', related)
+    monkeypatch.setattr('src.fact_check.search_fact_check', fact_check)
+    monkeypatch.setattr('src.model_registry.ModelRegistry', lambda: FakePredictor(calls))
+    monkeypatch.setattr('src.extraction_profiles.ExtractionProfiles', FakeProfiles)
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    yield calls
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def new_app():
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_text_analysis_is_cached_across_reruns(calls):
+    at = new_app()
+    at.radio[0].set_value('Text').run()
+    at.text_area(key='news_text').input(TEXT).run()
+
+    at.button[0].click().run()
+    at.button[0].click().run()
+    assert not at.exception
+    assert calls['predict'] == 1
+    assert calls['related'] == 1
+
+    # Switching input mode back and forth reruns the script without new work
+    at.radio[0].set_value('URL').run()
+    at.radio[0].set_value('Text').run()
+    at.button[0].click().run()
+    assert not at.exception
+    assert calls['predict'] == 1
+    assert calls['related'] == 1
+
+
+def test_url_analysis_is_cached_across_reruns(calls):
+    at = new_app()
+    at.text_input(key='news_url').input(URL).run()
+
+    at.button[0].click().run()
+    at.button[0].click().run()
+    assert not at.exception
+    assert not at.error
+    assert calls['extract'] == 1
+    assert calls['predict'] == 1
+    assert calls['related'] == 1
+
+    # The same article behind a different tracking link is not fetched again
+    at.text_input(key='news_url').input('http://example.com/news/story#comments').run()
+    at.button[0].click().run()
+    assert not at.exception
+    assert calls['extract'] == 1
+    assert calls['predict'] == 1
+
+
+def test_whitespace_variants_share_cache_entries(calls):
+    at = new_app()
+    at.radio[0].set_value('Text').run()
+    at.text_area(key='news_text').input(TEXT).run()
+    at.button[0].click().run()
+
+    at.text_area(key='news_text').input('  ' + TEXT.replace(' ', '   ') + '\n').run()
+    at.button[0].click().run()
+    assert not at.exception
+    assert calls['predict'] == 1
+    assert calls['related'] == 1
+
+
+def test_url_with_out_of_range_port_does_not_crash(calls):
+    at = new_app()
+    at.text_input(key='news_url').input('http://example.com:99999/a').run()
+    at.button[0].click().run()
+    assert not at.exception
@@ -0,0 +1,71 @@
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+import pytest
+from src.extraction_profiles import ExtractionProfiles
+from src.extractor import extract_article_text
+
+TITLE = 'नेपाल समाचार'
+PARAGRAPH = (
+    '<p>' + 'The government of Nepal announced a new budget today with more money '
+    'for schools and hospitals in every province. नेपाल ' * 6 + '</p>'
+)
+# UTF-8 page with no charset in the Content-Type header or the HTML
+PAGE = (
+    f'<html><head><title>{TITLE}</title></head><body>'
+    f'<article class="story">{PARAGRAPH * 5}</article></body></html>'
+).encode('utf-8')
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+def test_profiles_path_decodes_utf8_without_charset(site):
+    profiles = ExtractionProfiles(path=None)
+    methods = []
+    for i in range(4):
+        result = extract_article_text(f'{site}/story-{i}', domain_profiles=profiles)
+        assert result['success']
+        assert result['title'] == TITLE
+        assert 'नेपाल' in result['text']
+        methods.append(result['method'])
+    # Learned after two pages, then served by the fast path
+    assert methods == ['newspaper', 'newspaper', 'profile', 'profile']
+
+
+def test_misses_save_only_when_the_profile_is_reset(tmp_path, monkeypatch):
+    from src import extraction_profiles
+
+    path = str(tmp_path / 'profiles.json')
+    profiles = ExtractionProfiles(path=path)
+    html = PAGE.decode('utf-8')
+    text = '\n\n'.join([' '.join(PARAGRAPH[3:-4].split())] * 5)
+    for i in range(2):
+        profiles.learn(f'https://example.com/story-{i}', html, text)
+    assert profiles.active_selector('https://example.com/x') == 'article.story'
+
+    saves = []
+    monkeypatch.setattr(profiles, 'save', lambda *args: saves.append(args))
+    layout_changed = '<html><body><div class="new">short</div></body></html>'
+    for i in range(extraction_profiles.MAX_MISSES - 1):
+        assert profiles.extract(f'https://example.com/new-{i}', layout_changed) is None
+    assert saves == []
+
+    assert profiles.extract('https://example.com/new-last', layout_changed) is None
+    assert len(saves) == 1
+    assert profiles.active_selector('https://example.com/x') is None
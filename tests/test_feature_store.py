@@ -0,0 +1,74 @@
+import os
+import numpy as np
+import pytest
+from src.feature_store import FeatureStore, rescore
+from src.predictor import FakeNewsPredictor
+
+TEXTS = [
+    'The government announced a new budget for schools and hospitals today.',
+    'Scientists confirm that drinking seawater cures every known disease overnight.',
+    '',
+]
+IDS = ['a', 'b', 'c']
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    predictor = FakeNewsPredictor(
+        model_path=f'{ROOT}/model/model.pkl', tfidf_path=f'{ROOT}/model/tfidf_vectorizer.pkl'
+    )
+    if predictor.model is None:
+        pytest.skip('model files are not available')
+    return predictor
+
+
+def test_feature_store_requires_ids(predictor, tmp_path):
+    store = FeatureStore(predictor.tfidf, str(tmp_path))
+    with pytest.raises(ValueError):
+        predictor.predict_batch(TEXTS, feature_store=store)
+    with pytest.raises(ValueError):
+        predictor.predict_batch(TEXTS, ids=IDS[:2], feature_store=store)
+
+
+def test_rescore_reproduces_stored_predictions(predictor, tmp_path):
+    store = FeatureStore(predictor.tfidf, str(tmp_path))
+    batch = predictor.predict_batch(TEXTS, ids=IDS, feature_store=store)
+    store.flush()
+    assert len(store) == 2
+
+    (ids, rescored), = rescore(store, predictor.model)
+    assert list(ids) == ['a', 'b']
+    assert list(rescored.codes) == list(batch.codes[:2])
+
+
+def test_failed_batch_is_not_stored(predictor, tmp_path, monkeypatch):
+    store = FeatureStore(predictor.tfidf, str(tmp_path))
+
+    def broken(vectors):
+        raise RuntimeError('model failed')
+
+    monkeypatch.setattr(predictor.model, 'predict_proba', broken)
+    batch = predictor.predict_batch(TEXTS, ids=IDS, feature_store=store)
+    store.flush()
+    assert batch.errors[0][0] == 'Prediction failed'
+    assert len(store) == 0
+
+
+def test_storage_error_is_not_reported_as_failed_predictions(predictor, tmp_path, monkeypatch):
+    store = FeatureStore(predictor.tfidf, str(tmp_path), shard_rows=1)
+
+    def disk_full(*args, **kwargs):
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr('numpy.save', disk_full)
+    with pytest.raises(OSError):
+        predictor.predict_batch(TEXTS, ids=IDS, feature_store=store)
+    # Without a store the same batch scores normally
+    assert not predictor.predict_batch(TEXTS[:2]).errors
+
+
+def test_thresholds_match_single_threshold():
+    lengths = np.array([0, 29, 30, 149, 150, 10000])
+    assert list(FakeNewsPredictor._thresholds(lengths)) == \
+        [FakeNewsPredictor._threshold(n) for n in lengths]
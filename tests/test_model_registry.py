@@ -0,0 +1,101 @@
+import os
+import threading
+import pytest
+from src import model_registry
+from src.model_registry import ModelRegistry
+
+TEXT = 'the ministry announced the budget in parliament today'
+
+
+@pytest.fixture
+def model_dir(write_model, tmp_path):
+    write_model(str(tmp_path / 'versions' / '001'), seed=0)
+    return tmp_path
+
+
+def wait_for_shadow(registry):
+    registry._shadow_executor.submit(lambda: None).result(timeout=10)
+
+
+def test_new_version_is_swapped_in(write_model, model_dir):
+    registry = ModelRegistry(str(model_dir), watch=False)
+    old = registry._active
+    assert registry.version == '001'
+    assert registry.check_for_update() is False
+
+    write_model(str(model_dir / 'versions' / '002'), seed=1)
+    assert registry.check_for_update() is True
+    assert registry.version == '002'
+    assert registry._active is not old
+    assert registry.predict(TEXT)['label'] in ('Real', 'Fake')
+    registry.close()
+
+
+def test_second_stage_comes_from_the_version_directory(write_model, model_dir):
+    registry = ModelRegistry(str(model_dir), watch=False)
+    assert registry._active.second_stage_path == str(model_dir / 'versions' / '001' / 'all_models.pkl')
+    # No all_models.pkl in the version: the cascade does not escalate
+    assert registry._active.load_second_stage() is None
+    registry.close()
+
+
+def test_shadowed_candidate_is_promoted_and_stats_kept(write_model, model_dir):
+    registry = ModelRegistry(str(model_dir), watch=False, shadow_fraction=1.0, shadow_samples=3)
+    write_model(str(model_dir / 'versions' / '002'), seed=1)
+    registry.check_for_update()
+    assert registry.version == '001'
+    assert registry.status()['candidate_version'] == '002'
+
+    for _ in range(3):
+        registry.predict(TEXT)
+        wait_for_shadow(registry)
+
+    status = registry.status()
+    assert registry.version == '002'
+    assert status['candidate_version'] is None
+    assert status['shadow']['version'] == '002'
+    assert status['shadow']['outcome'] == 'promoted'
+    assert status['shadow']['samples'] == 3
+    assert status['shadow']['agreement'] == 1.0
+    assert status['shadow']['candidate_ms'] > 0
+    registry.close()
+
+
+def test_disagreeing_candidate_is_rejected(write_model, model_dir):
+    registry = ModelRegistry(str(model_dir), watch=False, shadow_fraction=1.0, shadow_samples=2,
+                             min_agreement=1.01)
+    write_model(str(model_dir / 'versions' / '002'), seed=1)
+    registry.check_for_update()
+    for _ in range(2):
+        registry.predict(TEXT)
+        wait_for_shadow(registry)
+
+    status = registry.status()
+    assert registry.version == '001'
+    assert status['rejected_version'] == '002'
+    assert status['shadow']['outcome'] == 'rejected'
+    assert registry.check_for_update() is False
+    registry.close()
+
+
+def test_shadow_queue_is_bounded(write_model, model_dir, monkeypatch):
+    monkeypatch.setattr(model_registry, 'MAX_SHADOW_PENDING', 2)
+    registry = ModelRegistry(str(model_dir), watch=False, shadow_fraction=1.0, shadow_samples=1000)
+    write_model(str(model_dir / 'versions' / '002'), seed=1)
+    registry.check_for_update()
+
+    release = threading.Event()
+    candidate = registry._candidate
+    predict = candidate.predict
+    monkeypatch.setattr(candidate, 'predict', lambda text, **kw: release.wait(5) and predict(text))
+
+    for _ in range(20):
+        registry.predict(TEXT)
+    assert registry._shadow_pending == 2
+    assert registry.status()['shadow']['skipped'] == 18
+
+    release.set()
+    wait_for_shadow(registry)
+    assert registry._shadow_pending == 0
+    assert registry.status()['shadow']['samples'] == 2
+    registry.close()
@@ -0,0 +1,85 @@
+import threading
+import time
+from src.pipeline import analyze_url
+
+ARTICLE = {
+    'title': 'Budget announced',
+    'text': 'The ministry announced the budget.',
+    'full_text': 'Budget announced. The ministry announced the budget.',
+    'success': True,
+    'error': None,
+}
+
+
+def extract(url):
+    return dict(ARTICLE)
+
+
+def predict(text):
+    return {'label': 'Real', 'confidence': 90.0, 'error': None}
+
+
+def slow(seconds, value):
+    def stage(arg):
+        time.sleep(seconds)
+        return value
+    return stage
+
+
+def fails(arg):
+    raise RuntimeError('lookup service down')
+
+
+def test_all_stages_succeed():
+    analysis = analyze_url('https://example.com/a', predict, extract=extract,
+                           related=lambda title: ['r'], fact_check=lambda title: ['f'])
+    assert analysis['error'] is None and analysis['error_stage'] is None
+    assert analysis['related'] == ['r'] and analysis['fact_checks'] == ['f']
+    assert analysis['degraded'] == {}
+    assert set(analysis['timings']) == {'extract', 'prediction', 'related', 'fact_checks', 'total'}
+
+
+def test_slow_or_failing_lookups_degrade_without_failing():
+    start = time.monotonic()
+    analysis = analyze_url('https://example.com/a', predict, extract=extract,
+                           related=slow(1.0, ['late']), fact_check=fails, lookup_timeout=0.1)
+    assert time.monotonic() - start < 0.8
+    assert analysis['error'] is None
+    assert analysis['prediction']['label'] == 'Real'
+    assert analysis['related'] == [] and analysis['fact_checks'] == []
+    assert analysis['degraded'] == {
+        'related': 'timed out after 0.1s',
+        'fact_checks': 'lookup service down',
+    }
+    assert 'related' not in analysis['timings']
+
+
+def test_slow_prediction_is_an_error():
+    analysis = analyze_url('https://example.com/a', slow(1.0, {'error': None}), extract=extract,
+                           related=lambda t: [], fact_check=lambda t: [], predict_timeout=0.1)
+    assert analysis['error'] == 'Prediction timed out after 0.1s.'
+    assert analysis['error_stage'] == 'prediction'
+
+
+def test_slow_extraction_is_an_error():
+    analysis = analyze_url('https://example.com/a', predict, extract=slow(1.0, ARTICLE),
+                           extract_timeout=0.1)
+    assert analysis['error'] == 'Extraction timed out after 0.1s.'
+    assert analysis['error_stage'] == 'extract'
+    assert analysis['article'] is None
+
+
+def test_timed_out_stage_does_not_write_into_returned_result():
+    release = threading.Event()
+
+    def blocked(title):
+        release.wait(5)
+        return ['late']
+
+    analysis = analyze_url('https://example.com/a', predict, extract=extract,
+                           related=blocked, fact_check=lambda t: [], lookup_timeout=0.05)
+    timings = dict(analysis['timings'])
+    release.set()
+    time.sleep(0.1)
+    assert analysis['timings'] == timings
+    assert analysis['related'] == []
@@ -0,0 +1,150 @@
+import os
+import pickle
+import random
+import numpy as np
+import pytest
+from src.predictor import FakeNewsPredictor
+
+WORDS = 'shocking secret miracle hoax banned exposed cure conspiracy ministry budget ' \
+        'parliament statement announced official report council the of and to in news'.split()
+
+
+@pytest.fixture(scope='module')
+def model_paths(write_model, tmp_path_factory):
+    return write_model(str(tmp_path_factory.mktemp('model')))
+
+
+@pytest.fixture
+def predictor(model_paths, tmp_path):
+    return FakeNewsPredictor(second_stage_path=str(tmp_path / 'missing.pkl'), **model_paths)
+
+
+def mixed_text(n, seed=1):
+    rng = random.Random(seed)
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+# -------------------- long-document mode --------------------
+
+@pytest.mark.parametrize('n', [10, 700, 3000])
+def test_incremental_score_equals_full_transform(predictor, n):
+    text = mixed_text(n)
+    full = predictor.predict(text, long_document=False)
+    incremental = predictor.predict(text, long_document=True, window=50, tolerance=0,
+                                    max_tokens=10 ** 6)
+    assert incremental.long_document['stop_reason'] == 'exhausted'
+    assert incremental.long_document['tokens_read'] == n
+    assert incremental.real_prob == pytest.approx(full.real_prob, abs=1e-12)
+    assert incremental.fake_prob == pytest.approx(full.fake_prob, abs=1e-12)
+
+
+def test_stop_reason_converged(predictor):
+    text = mixed_text(5000)
+    result = predictor.predict(text, long_document=True, window=200, tolerance=0.05,
+                               patience=2, max_tokens=10 ** 6)
+    info = result.long_document
+    assert info['stop_reason'] == 'converged'
+    assert info['tokens_read'] < 5000
+    assert info['windows'] == info['tokens_read'] // 200
+
+
+def test_stop_reason_budget(predictor):
+    result = predictor.predict(mixed_text(2000), long_document=True, window=100,
+                               tolerance=0, max_tokens=500)
+    assert result.long_document['stop_reason'] == 'budget'
+    assert result.long_document['tokens_read'] == 500
+    assert result.long_document['windows'] == 5
+
+
+def test_stop_reason_budget_after_truncation(predictor):
+    # Digits are removed by clean_text, so the raw text is cut at the
+    # character limit while far fewer tokens than the budget remain
+    text = ' '.join(['budget ' + '7' * 200] * 100)
+    result = predictor.predict(text, long_document=True, max_tokens=50)
+    info = result.long_document
+    assert info['tokens_read'] < 50
+    assert info['stop_reason'] == 'budget'
+
+
+# -------------------- cascade mode --------------------
+
+class StubSecondStage:
+    """Second stage that is sure every item is real and counts its calls"""
+
+    def __init__(self, n_features):
+        self.n_features_in_ = n_features
+        self.calls = []
+
+    def predict_proba(self, vectors):
+        self.calls.append(vectors.shape[0])
+        return np.tile([0.05, 0.95], (vectors.shape[0], 1))
+
+
+CONFIDENT_TEXT = ' '.join(['ministry budget parliament statement announced official report council'] * 10)
+
+
+@pytest.fixture
+def cascade_predictor(model_paths, tmp_path):
+    predictor = FakeNewsPredictor(second_stage_path=str(tmp_path / 'all_models.pkl'), **model_paths)
+    stub = StubSecondStage(len(predictor.tfidf.vocabulary_))
+    predictor._second_stage, predictor._second_stage_checked = stub, True
+    return predictor, stub
+
+
+def test_single_prediction_escalates_only_when_uncertain(cascade_predictor):
+    predictor, stub = cascade_predictor
+    uncertain_text = mixed_text(20)
+    assert predictor.predict(uncertain_text).uncertain
+    assert not predictor.predict(CONFIDENT_TEXT).uncertain
+
+    result = predictor.predict(uncertain_text, cascade=True)
+    assert result.escalated is True
+    assert result.real_prob == 0.95 and result.label == 'Real' and not result.uncertain
+
+    result = predictor.predict(CONFIDENT_TEXT, cascade=True)
+    assert result.escalated is False
+    assert stub.calls == [1]
+
+
+def test_batch_escalates_uncertain_items_in_one_call(cascade_predictor):
+    predictor, stub = cascade_predictor
+    texts = [mixed_text(20, seed=i) for i in range(6)] + [CONFIDENT_TEXT, '']
+    plain = predictor.predict_batch(texts)
+    expected = plain.uncertain.copy()
+    assert 0 < expected.sum() < len(texts) - 1
+
+    batch = predictor.predict_batch(texts, cascade=True)
+    assert list(batch.escalated) == list(expected)
+    assert stub.calls == [int(expected.sum())]
+    assert np.allclose(batch.probabilities[expected], [0.05, 0.95])
+    assert not batch.uncertain[expected].any()
+    assert batch.errors[7][0] == 'Invalid input'
+
+
+def test_second_stage_defaults_to_the_model_directory(model_paths):
+    predictor = FakeNewsPredictor(**model_paths)
+    assert predictor.second_stage_path == os.path.join(
+        os.path.dirname(model_paths['model_path']), 'all_models.pkl')
+
+
+@pytest.mark.parametrize('mismatch', ['width', 'fingerprint'])
+def test_second_stage_for_another_vectorizer_is_not_used(model_paths, tmp_path, mismatch):
+    from src.feature_store import vectorizer_fingerprint
+
+    predictor = FakeNewsPredictor(second_stage_path=str(tmp_path / 'all_models.pkl'), **model_paths)
+    n_features = len(predictor.tfidf.vocabulary_)
+    models = {'Gradient_Boosting': StubSecondStage(n_features + (mismatch == 'width')),
+              'vectorizer_fingerprint': vectorizer_fingerprint(predictor.tfidf)}
+    if mismatch == 'fingerprint':
+        models['vectorizer_fingerprint'] = 'another'
+    with open(predictor.second_stage_path, 'wb') as f:
+        pickle.dump(models, f)
+    assert predictor.load_second_stage() is None
+    assert predictor.predict(mixed_text(20), cascade=True).escalated is False
+
+    models['vectorizer_fingerprint'] = vectorizer_fingerprint(predictor.tfidf)
+    models['Gradient_Boosting'] = StubSecondStage(n_features)
+    with open(predictor.second_stage_path, 'wb') as f:
+        pickle.dump(models, f)
+    assert FakeNewsPredictor(second_stage_path=predictor.second_stage_path,
+                             **model_paths).load_second_stage() is not None
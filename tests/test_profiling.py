@@ -0,0 +1,44 @@
+import os
+import time
+from src import profiling
+from src.profiling import StackSampler, profile_stage, profiling_requested
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_dump_has_no_sampler_teardown_frames(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.DIR_ENV, str(tmp_path))
+    monkeypatch.setenv(profiling.MODE_ENV, 'sample')
+    for _ in range(5):
+        with profile_stage('busy', enabled=True):
+            busy(0.05)
+
+    dumps = os.listdir(tmp_path)
+    assert len(dumps) == 5
+    for name in dumps:
+        content = (tmp_path / name).read_text(encoding='utf-8')
+        assert 'busy (' in content
+        assert '_wait_for_tstate_lock' not in content
+        assert 'stop (profiling.py' not in content
+
+
+def test_sampler_records_nothing_after_stop():
+    import threading
+    sampler = StackSampler(threading.get_ident(), interval=0.001)
+    sampler.start()
+    busy(0.02)
+    sampler.stop()
+    assert sampler.stacks
+    assert not any('join' in stack for stack in sampler.stacks)
+
+
+def test_malformed_rate_disables_sampling(monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    monkeypatch.setenv(profiling.RATE_ENV, 'abc')
+    assert profiling_requested() is False
+    monkeypatch.setenv(profiling.RATE_ENV, '1')
+    assert profiling_requested() is True
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from src.predictor import FakeNewsPredictor
+from src.results import BatchPredictions, Prediction
+
+
+def old_predict_dict(fake_prob, real_prob, threshold):
+    """The dict FakeNewsPredictor.predict returned before Prediction existed"""
+    if real_prob > threshold:
+        prediction, label, confidence = 1, 'Real', real_prob * 100
+    elif fake_prob > threshold:
+        prediction, label, confidence = 0, 'Fake', fake_prob * 100
+    else:
+        prediction, label, confidence = 1, 'Real', max(real_prob, 51.0) * 100
+    return {
+        'prediction': prediction,
+        'label': label,
+        'confidence': round(confidence, 2),
+        'probabilities': {'fake': round(fake_prob * 100, 2), 'real': round(real_prob * 100, 2)},
+        'error': None,
+    }
+
+
+@pytest.mark.parametrize('fake_prob, real_prob, threshold', [
+    (0.1, 0.9, 0.85),      # real
+    (0.93, 0.07, 0.75),    # fake
+    (0.4, 0.6, 0.65),      # uncertain
+    (0.3333, 0.6667, 0.65),
+])
+def test_to_dict_matches_old_dict(fake_prob, real_prob, threshold):
+    result = FakeNewsPredictor._build_result(fake_prob, real_prob, threshold)
+    assert result.to_dict() == old_predict_dict(fake_prob, real_prob, threshold)
+
+
+def test_error_to_dict_matches_old_dict():
+    assert Prediction.failure('Invalid input', 'Text is empty after cleaning').to_dict() == {
+        'prediction': 'Error',
+        'label': 'Invalid input',
+        'confidence': 0.0,
+        'error': 'Text is empty after cleaning',
+    }
+
+
+def test_prediction_behaves_like_a_dict():
+    result = Prediction(0, 0.9, 0.1)
+    expected = result.to_dict()
+    assert 'error' in result and 'missing' not in result
+    assert dict(result) == expected
+    assert list(result) == list(expected)
+    assert set(result.keys()) == set(expected)
+    assert len(result) == len(expected)
+    assert result == expected
+    assert result['label'] == 'Fake' and result.get('missing', 1) == 1
+    with pytest.raises(KeyError):
+        result['missing']
+    assert {**result}['confidence'] == 90.0
+
+
+def test_optional_entries_only_when_set():
+    result = Prediction(1, 0.2, 0.8)
+    assert 'escalated' not in result and 'long_document' not in result
+    result.escalated = False
+    result.long_document = {'stop_reason': 'budget'}
+    assert result['escalated'] is False
+    assert result['long_document'] == {'stop_reason': 'budget'}
+
+
+@pytest.fixture
+def batch():
+    return BatchPredictions(
+        codes=[1, 0, -1, 1],
+        probabilities=[[0.1, 0.9], [0.8, 0.2], [0, 0], [0.4, 0.6]],
+        uncertain=[False, False, False, True],
+        escalated=[False, False, False, True],
+        errors={2: ('Invalid input', 'Text is empty after cleaning')},
+    )
+
+
+def test_batch_items_match_single_predictions(batch):
+    items = list(batch)
+    assert [p.label for p in items] == ['Real', 'Fake', 'Invalid input', 'Real']
+    assert batch[-1].uncertain and batch[-1].escalated
+    assert batch.to_dicts()[2] == Prediction.failure('Invalid input', 'Text is empty after cleaning').to_dict()
+    assert batch.to_dicts()[1]['probabilities'] == {'fake': 80.0, 'real': 20.0}
+
+
+def test_to_npy_round_trip(batch, tmp_path):
+    batch.to_npy(str(tmp_path))
+    assert np.array_equal(np.load(tmp_path / 'codes.npy'), batch.codes)
+    assert np.array_equal(np.load(tmp_path / 'probabilities.npy'), batch.probabilities)
+    assert np.array_equal(np.load(tmp_path / 'uncertain.npy'), batch.uncertain)
+    assert np.array_equal(np.load(tmp_path / 'escalated.npy'), batch.escalated)
+    errors = np.load(tmp_path / 'error.npy', allow_pickle=True)
+    assert list(errors) == [None, None, 'Text is empty after cleaning', None]
+
+
+def test_to_arrow_and_parquet(batch, tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    table = batch.to_arrow()
+    assert table.column_names == ['code', 'fake_prob', 'real_prob', 'uncertain', 'escalated', 'error']
+    assert table.column('code').to_pylist() == [1, 0, -1, 1]
+    assert table.column('real_prob').to_pylist() == pytest.approx([0.9, 0.2, 0.0, 0.6])
+    assert table.column('error').to_pylist() == [None, None, 'Text is empty after cleaning', None]
+
+    batch.to_parquet(str(tmp_path / 'scores.parquet'))
+    assert pq.read_table(str(tmp_path / 'scores.parquet')).equals(table)
+
+
+def test_failed_batch(batch):
+    failed = BatchPredictions.failed(3, 'Model not loaded', 'Model or vectorizer not loaded properly')
+    assert [p.label for p in failed] == ['Model not loaded'] * 3
+    assert failed.escalated is None
@@ -0,0 +1,67 @@
+import pytest
+from src.url_filter import UrlDeduplicator
+from src.utils import canonicalize_url
+
+
+def test_failed_fetch_is_retried_on_the_next_run(tmp_path):
+    path = str(tmp_path / 'urls.bloom')
+    feed = [
+        'https://www.example.com/a?utm_source=x',
+        'http://m.example.com/a/',
+        'https://example.com/b',
+    ]
+
+    dedup = UrlDeduplicator(path, initial_capacity=10)
+    assert list(dedup.filter(feed)) == [
+        ('https://www.example.com/a?utm_source=x', 'https://example.com/a'),
+        ('https://example.com/b', 'https://example.com/b'),
+    ]
+    # Only /a was fetched successfully
+    dedup.mark_processed('https://example.com/a')
+    dedup.save()
+
+    dedup = UrlDeduplicator(path)
+    assert dedup.seen('https://example.com/a#top') is None
+    assert dedup.seen('https://example.com/b') == 'https://example.com/b'
+    assert list(dedup.filter(feed)) == [('https://example.com/b', 'https://example.com/b')]
+
+
+def test_saved_filter_keeps_all_slices(tmp_path):
+    path = str(tmp_path / 'urls.bloom')
+    dedup = UrlDeduplicator(path, initial_capacity=16)
+    urls = [f'https://example.com/story-{i}' for i in range(200)]
+    for url in urls:
+        dedup.mark_processed(url)
+    dedup.save()
+
+    loaded = UrlDeduplicator(path)
+    assert len(loaded.processed.filters) == len(dedup.processed.filters) > 1
+    assert len(loaded.processed) == 200
+    assert all(loaded.seen(url) is None for url in urls)
+
+
+def test_filter_yields_the_raw_url_to_fetch():
+    dedup = UrlDeduplicator()
+    assert list(dedup.filter(['http://localhost:8501/', 'http://m.example.com/story'])) == [
+        ('http://localhost:8501/', 'https://localhost:8501/'),
+        ('http://m.example.com/story', 'https://example.com/story'),
+    ]
+
+
+@pytest.mark.parametrize('amp, canonical', [
+    ('https://example.com/2024/story.amp.html', 'https://example.com/2024/story.html'),
+    ('https://amp.example.com/2024/story.html', 'https://example.com/2024/story.html'),
+    ('https://example.com/2024/story/amp/', 'https://example.com/2024/story'),
+    ('https://example.com/amp/2024/story', 'https://example.com/2024/story'),
+    ('https://example.com/2024/story?amp=1&utm_medium=x', 'https://example.com/2024/story'),
+    ('https://www.google.com/amp/s/example.com/2024/story.amp.html', 'https://example.com/2024/story.html'),
+    ('https://example-com.cdn.ampproject.org/c/s/example.com/2024/story', 'https://example.com/2024/story'),
+])
+def test_amp_variant_matches_its_canonical_page(amp, canonical):
+    assert canonicalize_url(amp) == canonicalize_url(canonical)
+
+
+def test_only_google_hosts_are_unwrapped():
+    # Treated as the publisher's own /amp/ path, not as a cache link
+    assert canonicalize_url('https://notgoogle.com/amp/s/x.com/a') == 'https://notgoogle.com/s/x.com/a'
+    assert canonicalize_url('https://google.com/amp/s/x.com/a') == 'https://x.com/a'